@@ -2,68 +2,226 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime, timedelta
+import functools
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 import warnings
 warnings.filterwarnings('ignore')
 
-# Configuration de la page
-st.set_page_config(
-    page_title="Analyse de la Défense Européenne - UE",
-    page_icon="🛡️",
-    layout="wide",
-    initial_sidebar_state="expanded"
+# Valeurs par défaut des simulateurs lorsqu'une configuration ne les précise pas :
+# niveaux de base puis paramètres de croissance (taux annuels, plafonds, plancher)
+DEFAUTS_SIMULATION = {
+    'budget_base': 10.0,
+    'personnel_base': 50000,
+    'projets_pesco_base': 5,
+    'croissance_budget': 0.03,
+    'evolution_personnel': -0.005,
+    'plafond_interoperabilite': 95,
+    'plafond_equipements': 90,
+    'plancher_temps_reaction': 7
+}
+
+# Analyse de sensibilité : plage (bas, haut) balayée pour chaque paramètre de
+# croissance, indicateurs clés observés et taille des grilles de la carte de chaleur
+PLAGES_SENSIBILITE = {
+    'croissance_budget': (0.0, 0.06),
+    'evolution_personnel': (-0.02, 0.01),
+    'plafond_interoperabilite': (70, 100),
+    'plafond_equipements': (70, 100),
+    'plancher_temps_reaction': (3, 14)
+}
+INDICATEURS_CLES = ['Budget_Defense_Mds', 'Personnel', 'Interoperabilite', 'Temps_Reaction_Jours']
+TAILLE_GRILLE_SENSIBILITE = 100
+
+# Export : lignes par bloc écrit, limite de lignes d'une feuille Excel (en-tête compris)
+TAILLE_BLOC_EXPORT = 100_000
+LIGNES_MAX_XLSX = 1_048_576
+
+# Types compacts des indicateurs : effectifs entiers sur 32 bits, tout le reste
+# (montants, pourcentages, comptages) en flottants 32 bits. L'année est stockée en
+# int16 en résolution annuelle, en float32 sinon (voir apply_schema).
+SCHEMA_INDICATEURS = {
+    'Personnel': 'int32'
+}
+TYPE_INDICATEUR_DEFAUT = 'float32'
+
+# Agrégation des États membres vers une entité de type « union » (UE-27) : les volumes
+# sont sommés, les activités partagées (un projet ou un exercice commun est compté par
+# chaque participant) prennent le maximum, les autres indicateurs (taux, délais) la moyenne
+AGREGATION_UNION = {
+    'Budget_Defense_Mds': 'sum',
+    'Personnel': 'sum',
+    'Economies_Echelle_Mds': 'sum',
+    'Projets_PESCO': 'max',
+    'Exercices_Communs': 'max'
+}
+
+# Fichier versionné des configurations par entité (profils, héritage, surcharges)
+CONFIG_PATH = os.environ.get(
+    'DEFENSE_CONFIG', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config_defense.json')
 )
 
-# CSS personnalisé
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        background: linear-gradient(45deg, #0055A4, #FFCC00, #009900);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        text-align: center;
-        margin-bottom: 2rem;
-        font-weight: bold;
-    }
-    .metric-card {
-        background-color: #f0f2f6;
-        padding: 1rem;
-        border-radius: 10px;
-        border-left: 4px solid #0055A4;
-        margin: 0.5rem 0;
-    }
-    .section-header {
-        color: #0055A4;
-        border-bottom: 2px solid #0055A4;
-        padding-bottom: 0.5rem;
-        margin-top: 2rem;
-    }
-    .pays-card {
-        padding: 1rem;
-        border-radius: 10px;
-        margin: 0.5rem 0;
-        border-left: 5px solid #0055A4;
-        background-color: #f8f9fa;
-    }
-    .euro-flag {
-        background: linear-gradient(45deg, #0055A4, #FFCC00, #FFFFFF, #FF0000);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        font-weight: bold;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Dernière année observée : les années suivantes sont des projections
+DERNIERE_ANNEE_OBSERVEE = 2022
+
+# Incertitudes du moteur Monte Carlo sur les années de projection :
+# écart-type de la pente annuelle (relatif à la valeur de la dernière année observée
+# ou absolu), bornes des indicateurs et chocs (probabilité annuelle, moyenne, écart-type).
+# Une borne nommée est un paramètre de DEFAUTS_SIMULATION lu dans la configuration de l'entité
+INCERTITUDES_MONTE_CARLO = {
+    'Budget_Defense_Mds': {'echelle': 'relatif', 'ecart_type': 0.01, 'bornes': (0, None),
+                           'chocs': (0.10, -0.05, 0.03)},
+    'Personnel': {'echelle': 'relatif', 'ecart_type': 0.004, 'bornes': (0, None),
+                  'chocs': (0.05, -0.02, 0.01)},
+    'Interoperabilite': {'echelle': 'absolu', 'ecart_type': 2.0, 'bornes': (0, 'plafond_interoperabilite')},
+    'Capacite_Projection': {'echelle': 'absolu', 'ecart_type': 2.0, 'bornes': (0, 95)},
+    'Temps_Reaction_Jours': {'echelle': 'absolu', 'ecart_type': 0.6, 'bornes': ('plancher_temps_reaction', None)},
+    'Equipements_Interoperables': {'echelle': 'absolu', 'ecart_type': 2.5, 'bornes': (0, 'plafond_equipements')}
+}
+PERCENTILES_MONTE_CARLO = [5, 25, 50, 75, 95]
+GRAINE_MONTE_CARLO = 2017
+
+# Sous-échantillonnage des séries longues : un paquet min/max par pixel de largeur,
+# et traces WebGL (Scattergl) au-delà d'un certain nombre de points envoyés
+LARGEUR_GRAPHIQUE_PX = 800
+SEUIL_WEBGL = 1000
+
+# Instrumentation : nombre de mesures conservées par étape, percentiles affichés et
+# répertoire des exports (panneau visible avec ?admin=1 ou DASHBOARD_ADMIN=1)
+FENETRE_PERFORMANCE = 500
+QUANTILES_PERFORMANCE = [50, 90, 99]
+PERF_EXPORT_DIR = os.environ.get('DASHBOARD_PERF_DIR', tempfile.gettempdir())
+
+# Cache persistant optionnel (répertoire, éventuellement sur un volume partagé entre
+# répliques) pour les données générées et les métriques dérivées ; la date d'utilisation
+# d'une entrée n'est rafraîchie qu'une fois par DISK_CACHE_ACCES_S secondes
+DISK_CACHE_PATH = os.environ.get('DASHBOARD_DISK_CACHE')
+DISK_CACHE_MAX_MO = float(os.environ.get('DASHBOARD_DISK_CACHE_MO', 512))
+DISK_CACHE_ACCES_S = 60
+
+# Version du schéma des résultats persistés (cache disque, fichiers de scénarios), à
+# incrémenter pour un changement qui ne touche pas ce fichier. Les clés incluent aussi
+# l'empreinte de ce fichier et la version de pandas (voir code_version)
+VERSION_SCHEMA = 1
+
+# Threads du pool de précalcul (sélections voisines, Monte Carlo)
+PRECALCUL_WORKERS = int(os.environ.get('DASHBOARD_PRECALCUL_WORKERS', 2))
+
+# Répertoire des jeux de scénarios multi-entités (fichiers Arrow IPC partagés) et taille
+# maximale, au-delà de laquelle les fichiers les moins récemment ouverts sont supprimés
+SCENARIO_DIR = os.environ.get('DASHBOARD_SCENARIO_DIR',
+                              os.path.join(tempfile.gettempdir(), 'dashboard_scenarios'))
+SCENARIO_DIR_MAX_MO = float(os.environ.get('DASHBOARD_SCENARIO_MO', 1024))
+
+# Répertoire des jeux de données réels (exports SIPRI, AED... en CSV ou Parquet)
+DATA_DIR = os.environ.get(
+    'DEFENSE_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+)
+
+# Avertissements attendus des caches st.* hors du serveur Streamlit (rapports, export,
+# API, benchmarks) : logger émetteur -> extrait du message, filtrés par configure_headless
+AVERTISSEMENTS_HORS_SERVEUR = {
+    'streamlit.runtime.caching.cache_data_api': 'No runtime found',
+    'streamlit.runtime.scriptrunner_utils.script_run_context': 'missing ScriptRunContext',
+}
+
+def configure_headless():
+    """Masque les seuls avertissements attendus des caches hors du serveur Streamlit"""
+    for nom, message in AVERTISSEMENTS_HORS_SERVEUR.items():
+        logging.getLogger(nom).addFilter(
+            lambda enregistrement, message=message: message not in enregistrement.getMessage()
+        )
+
+# Importé par un outil sans serveur : à faire avant que les décorateurs de cache ne s'appliquent
+if not st.runtime.exists():
+    configure_headless()
+
+class PerfRecorder:
+    """Durées des étapes d'un rerun, conservées sur une fenêtre glissante par étape"""
+    
+    def __init__(self, fenetre=FENETRE_PERFORMANCE):
+        self.fenetre = fenetre
+        self.durees = {}  # étape -> deque des dernières durées (secondes)
+        self.verrou = threading.Lock()
+    
+    @contextmanager
+    def measure(self, etape):
+        """Chronomètre le bloc et enregistre sa durée sous le nom de l'étape"""
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            duree = time.perf_counter() - debut
+            with self.verrou:
+                self.durees.setdefault(etape, deque(maxlen=self.fenetre)).append(duree)
+    
+    def snapshot(self):
+        """Nombre de mesures et percentiles (ms) par étape sur la fenêtre courante"""
+        with self.verrou:
+            durees = {etape: np.array(valeurs) for etape, valeurs in self.durees.items()}
+        return {
+            etape: {
+                'n': len(valeurs),
+                'total_ms': valeurs.sum() * 1000,
+                **{f'p{q}_ms': np.percentile(valeurs, q) * 1000 for q in QUANTILES_PERFORMANCE}
+            }
+            for etape, valeurs in sorted(durees.items())
+        }
+    
+    def to_prometheus(self):
+        """Format texte d'exposition Prometheus (résumé par étape)"""
+        lignes = ['# HELP dashboard_duree_secondes Durée des étapes du dashboard (fenêtre glissante)',
+                  '# TYPE dashboard_duree_secondes summary']
+        for etape, stats in self.snapshot().items():
+            for q in QUANTILES_PERFORMANCE:
+                lignes.append(f'dashboard_duree_secondes{{etape="{etape}",quantile="{q / 100}"}} '
+                              f'{stats[f"p{q}_ms"] / 1000:.6f}')
+            lignes.append(f'dashboard_duree_secondes_sum{{etape="{etape}"}} {stats["total_ms"] / 1000:.6f}')
+            lignes.append(f'dashboard_duree_secondes_count{{etape="{etape}"}} {stats["n"]}')
+        return '\n'.join(lignes) + '\n'
+    
+    def export(self, chemin):
+        """Écrit les mesures dans un fichier local (.prom : Prometheus, sinon JSON)"""
+        if chemin.endswith('.prom'):
+            contenu = self.to_prometheus()
+        else:
+            contenu = json.dumps(self.snapshot(), indent=2)
+        with open(chemin, 'w', encoding='utf-8') as f:
+            f.write(contenu)
+        return chemin
+
+def timed(etape=None):
+    """Décorateur : enregistre la durée de chaque appel dans le PerfRecorder du processus"""
+    def decorateur(fonction):
+        nom = etape or fonction.__name__
+        
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            with get_perf_recorder().measure(nom):
+                return fonction(*args, **kwargs)
+        return enveloppe
+    return decorateur
 
 class DefenseEuropeenneDashboard:
     def __init__(self):
         self.pays_options = self.define_pays_options()
         self.composantes_options = self.define_composantes_options()
+        self.sections = self.define_sections()
+        self.payload_octets = 0
+        self.differes = []
+        self.source = ParquetDataSource(DATA_DIR)
+        self.registry = get_config_registry(CONFIG_PATH)
         
     def define_pays_options(self):
         """Définit les pays de l'UE disponibles pour l'analyse"""
@@ -80,140 +238,360 @@ class DefenseEuropeenneDashboard:
             "Forces Terrestres", "Forces Maritimes", "Forces Aeriennes"
         ]
     
-    def generate_defense_data(self, pays_composante):
+    def analysis_period(self, debut=2017, fin=2027, pas_par_an=1):
+        """Retourne le vecteur d'années analysées (résolution annuelle, mensuelle, hebdomadaire...)"""
+        if pas_par_an == 1:
+            return np.arange(debut, fin + 1)
+        return debut + np.arange((fin - debut) * pas_par_an + 1) / pas_par_an
+    
+    def define_sections(self):
+        """Définit les sections du dashboard (une seule est construite par rerun)"""
+        return [
+            "📊 Vue d'Ensemble", 
+            "💰 Budgets & Effectifs", 
+            "🤝 Coopération", 
+            "⚡ Capacités", 
+            "📈 Efficacité",
+            "🌍 Europe",
+            "🎚️ Sensibilité"
+        ]
+    
+    @timed()
+    def generate_defense_data(self, pays_composante, annees=None):
         """Génère des données de défense simulées pour le dashboard"""
-        # Période d'analyse : 2017-2027
-        annees = list(range(2017, 2028))
+        # Période d'analyse : 2017-2027 (les membres d'un agrégat sont alors lus dans le cache)
+        periode_par_defaut = annees is None
+        if periode_par_defaut:
+            annees = self.analysis_period()
         
         # Configuration de base selon le pays/composante
         config = self.get_config(pays_composante)
         
-        data = {
-            'Annee': annees,
+        if config['type'] == 'union':
+            # Agrégat : cumul ascendant des séries des États membres
+            df = self.rollup(self.member_frames(None if periode_par_defaut else annees))
+        else:
+            data = {'Annee': np.asarray(annees)}
+            data.update(self.simulate_indicators(annees, config))
+            
+            # Ajouter des indicateurs spécifiques
+            if config['type'] == 'pays_ue':
+                if 'cyberdefense' in config.get('specialisations', []):
+                    data['Capacite_Cyber'] = self.simulate_cyber_capacity(annees)
+                if 'renseignement' in config.get('specialisations', []):
+                    data['Partage_Renseignement'] = self.simulate_intelligence_sharing(annees)
+            
+            df = self.apply_schema(data)
+        
+        # Les données réelles disponibles remplacent les valeurs simulées
+        reel = self.source.load(pays_composante, list(df.columns), annees)
+        if reel is not None:
+            df = self.apply_schema(self.overlay_real_data(df, reel))
+        
+        return df, config
+    
+    def member_states(self):
+        """États membres : entités de type pays_ue parmi les pays proposés"""
+        return [pays for pays in self.pays_options if self.get_config(pays)['type'] == 'pays_ue']
+    
+    def member_frames(self, annees=None):
+        """Séries des États membres, lues dans le cache (une entrée par membre) sur la période par défaut"""
+        if annees is None:
+            return [self.load_defense_data(membre)[0] for membre in self.member_states()]
+        return [self.generate_defense_data(membre, annees)[0] for membre in self.member_states()]
+    
+    def rollup(self, frames):
+        """Agrège des séries d'entités année par année en un seul groupby (voir AGREGATION_UNION)"""
+        empile = pd.concat(frames, ignore_index=True)
+        agregations = {col: AGREGATION_UNION.get(col, 'mean')
+                       for col in empile.columns if col != 'Annee'}
+        cumul = empile.groupby('Annee', sort=True).agg(agregations)
+        return self.apply_schema({'Annee': cumul.index.to_numpy(),
+                                  **{col: cumul[col].to_numpy() for col in cumul.columns}})
+    
+    def apply_schema(self, colonnes):
+        """Construit un DataFrame d'indicateurs (format large) aux types compacts du schéma"""
+        typees = {}
+        for col in colonnes:
+            valeurs = np.asarray(colonnes[col])
+            if col == 'Annee':
+                dtype = np.dtype(self.year_dtype(valeurs))
+            else:
+                dtype = np.dtype(SCHEMA_INDICATEURS.get(col, TYPE_INDICATEUR_DEFAUT))
+            if dtype.kind == 'i' and valeurs.dtype.kind == 'f':
+                valeurs = np.round(valeurs)
+            typees[col] = valeurs.astype(dtype, copy=False)
+        return pd.DataFrame(typees)
+    
+    def year_dtype(self, annees):
+        """int16 pour des années entières, float32 pour une résolution infra-annuelle"""
+        return 'int16' if np.all(np.mod(annees, 1) == 0) else 'float32'
+    
+    def overlay_real_data(self, df, reel):
+        """Remplace, année par année, les valeurs simulées par les valeurs réelles connues"""
+        reel = reel.drop_duplicates('Annee', keep='last').set_index('Annee')
+        reel.index = reel.index.astype(float)
+        df = df.copy()
+        # Sous l'année (pas mensuel, journalier), la valeur annuelle couvre tous les points
+        # de son année plutôt que le seul point tombant sur l'année entière
+        annees_entieres = np.floor(df['Annee'].to_numpy(dtype=float))
+        for col in reel.columns:
+            valeurs = reel[col].reindex(annees_entieres).to_numpy(dtype=float)
+            masque = ~np.isnan(valeurs)
+            if masque.any():
+                df[col] = np.where(masque, valeurs, df[col].to_numpy(dtype=float))
+        return df
+    
+    def simulate_indicators(self, annees, config):
+        """Calcule en un bloc colonnaire tous les indicateurs communs à toutes les entités"""
+        return {
             'Budget_Defense_Mds': self.simulate_budget(annees, config),
             'Personnel': self.simulate_personnel(annees, config),
             'Projets_PESCO': self.simulate_pesco_projects(annees, config),
-            'Interoperabilite': self.simulate_interoperability(annees),
+            'Interoperabilite': self.simulate_interoperability(annees, config),
             'Capacite_Projection': self.simulate_projection_capacity(annees),
-            'Temps_Reaction_Jours': self.simulate_reaction_time(annees),
+            'Temps_Reaction_Jours': self.simulate_reaction_time(annees, config),
             'Economies_Echelle_Mds': self.simulate_economies(annees, config),
             'Exercices_Communs': self.simulate_joint_exercises(annees),
-            'Equipements_Interoperables': self.simulate_interoperable_equipment(annees)
+            'Equipements_Interoperables': self.simulate_interoperable_equipment(annees, config)
         }
+    
+    def stack_configs(self, configs):
+        """Empile plusieurs configurations en colonnes (entités × 1) pour le calcul par lots"""
+        stacked = {'type': np.array([c['type'] for c in configs])[:, None]}
+        for nom, defaut in DEFAUTS_SIMULATION.items():
+            stacked[nom] = np.array([c.get(nom, defaut) for c in configs])[:, None]
+        return stacked
+    
+    def simulate_batch(self, entites, annees=None):
+        """Simule en une passe vectorisée plusieurs entités : {indicateur: tableau (entités × années)}"""
+        if annees is None:
+            annees = self.analysis_period()
+        annees = np.asarray(annees)
+        configs = [self.get_config(entite) for entite in entites]
+        stacked = self.stack_configs(configs)
         
-        # Ajouter des indicateurs spécifiques
-        if config['type'] in ['pays_ue', 'union']:
-            if 'cyberdefense' in config.get('specialisations', []):
-                data['Capacite_Cyber'] = self.simulate_cyber_capacity(annees)
-            if 'renseignement' in config.get('specialisations', []):
-                data['Partage_Renseignement'] = self.simulate_intelligence_sharing(annees)
+        forme = (len(configs), len(annees))
+        data = {nom: np.broadcast_to(valeurs, forme)
+                for nom, valeurs in self.simulate_indicators(annees, stacked).items()}
+        
+        for nom, specialisation, simulateur in [
+            ('Capacite_Cyber', 'cyberdefense', self.simulate_cyber_capacity),
+            ('Partage_Renseignement', 'renseignement', self.simulate_intelligence_sharing)
+        ]:
+            masque = np.array([c['type'] == 'pays_ue' and
+                               specialisation in c.get('specialisations', [])
+                               for c in configs])[:, None]
+            data[nom] = np.where(masque, simulateur(annees), np.nan)
+        
+        # Les agrégats sont réduits, indicateur par indicateur, sur les lignes des membres
+        # (eux-mêmes corrigés par leurs données réelles, comme dans generate_defense_data)
+        unions = [i for i, config in enumerate(configs) if config['type'] == 'union']
+        if unions:
+            membres, _ = self.simulate_batch(self.member_states(), annees)
+            self.fill_unions(data, unions, membres)
+        
+        self.overlay_real_batch(data, entites, annees)
+        return data, configs
+    
+    def overlay_real_batch(self, data, entites, annees):
+        """Remplace dans un lot (entités × années) les valeurs simulées par les valeurs réelles"""
+        reel = self.source.load_entities(entites, list(data), annees)
+        if reel is None:
+            return
+        reel = reel.drop_duplicates(['Entite', 'Annee'], keep='last')
+        # Chaque valeur annuelle couvre les points de son année (années croissantes) :
+        # une ligne réelle est répétée sur la plage [debut, fin) des colonnes de son année
+        annees_entieres = np.floor(np.asarray(annees, dtype=float))
+        annees_reelles = reel['Annee'].to_numpy(dtype=float)
+        debut = np.searchsorted(annees_entieres, annees_reelles, side='left')
+        nombre = np.searchsorted(annees_entieres, annees_reelles, side='right') - debut
+        source = np.repeat(np.arange(len(reel)), nombre)
+        colonnes = np.arange(nombre.sum()) - np.repeat(np.cumsum(nombre) - nombre, nombre) \
+            + np.repeat(debut, nombre)
+        lignes = pd.Index(entites).get_indexer(reel['Entite'])[source]
+        for nom in reel.columns.drop(['Entite', 'Annee']):
+            valeurs = reel[nom].to_numpy(dtype=float)[source]
+            data[nom] = np.array(data[nom], dtype=float)
+            # Un indicateur absent d'une entité (NaN) le reste, comme dans le format large
+            masque = (lignes >= 0) & ~np.isnan(valeurs)
+            masque[masque] &= ~np.isnan(data[nom][lignes[masque], colonnes[masque]])
+            if np.dtype(SCHEMA_INDICATEURS.get(nom, TYPE_INDICATEUR_DEFAUT)).kind == 'i':
+                valeurs = np.round(valeurs)
+            data[nom][lignes[masque], colonnes[masque]] = valeurs[masque]
+    
+    def fill_unions(self, data, unions, membres):
+        """Remplace les lignes des agrégats par la réduction (AGREGATION_UNION) des membres"""
+        reductions = {'sum': np.nansum, 'max': np.nanmax, 'mean': np.nanmean}
+        with warnings.catch_warnings():
+            # Spécialisation absente de tous les membres : NaN attendu
+            warnings.simplefilter('ignore', RuntimeWarning)
+            for nom in data:
+                data[nom] = np.array(data[nom])
+                data[nom][unions] = reductions[AGREGATION_UNION.get(nom, 'mean')](
+                    membres[nom], axis=0)
+    
+    @timed()
+    def sensitivity_sweep(self, entites, grilles, annee):
+        """Indicateurs d'une année sur une grille de paramètres, un axe par paramètre"""
+        configs = [self.get_config(entite) for entite in entites]
+        axes = len(grilles)
+        stacked = {nom: valeurs.reshape((-1,) + (1,) * axes)
+                   for nom, valeurs in self.stack_configs(configs).items()}
+        for axe, (nom, valeurs) in enumerate(grilles.items()):
+            forme = [1] * (axes + 1)
+            forme[axe + 1] = -1
+            stacked[nom] = np.asarray(valeurs, dtype=float).reshape(forme)
+        
+        forme = (len(configs),) + tuple(len(valeurs) for valeurs in grilles.values())
+        data = {nom: np.broadcast_to(valeurs, forme)
+                for nom, valeurs in self.simulate_indicators(np.asarray(annee), stacked).items()}
+        
+        unions = [i for i, config in enumerate(configs) if config['type'] == 'union']
+        if unions:
+            self.fill_unions(data, unions, self.sensitivity_sweep(self.member_states(), grilles, annee))
+        return data
+    
+    def sensitivity_effects(self, entite, annee):
+        """Indicateurs clés lorsque chaque paramètre prend seul sa valeur basse ou haute"""
+        config = self.get_config(entite)
+        grilles = {nom: [bas, config.get(nom, DEFAUTS_SIMULATION[nom]), haut]
+                   for nom, (bas, haut) in PLAGES_SENSIBILITE.items()}
+        resultats = self.sensitivity_sweep([entite], grilles, annee)
         
-        return pd.DataFrame(data), config
+        # Un seul balayage (bas, référence, haut)^k : chaque effet est lu au point où
+        # tous les autres paramètres sont à leur valeur de référence
+        reference = (0,) + (1,) * len(grilles)
+        lignes = []
+        for axe, (nom, valeurs) in enumerate(grilles.items()):
+            for indicateur in INDICATEURS_CLES:
+                point = list(reference)
+                ligne = {'Parametre': nom, 'Indicateur': indicateur,
+                         'reference': resultats[indicateur][reference]}
+                for position, cote in [(0, 'bas'), (2, 'haut')]:
+                    point[axe + 1] = position
+                    ligne[cote] = resultats[indicateur][tuple(point)]
+                    ligne[f'valeur_{cote}'] = valeurs[position]
+                lignes.append(ligne)
+        return pd.DataFrame(lignes)
+    
+    def sensitivity_grid(self, entite, parametre_x, parametre_y, indicateur, annee):
+        """Indicateur sur une grille TAILLE_GRILLE_SENSIBILITE² de deux paramètres (lignes : y)"""
+        grilles = {nom: np.linspace(*PLAGES_SENSIBILITE[nom], TAILLE_GRILLE_SENSIBILITE)
+                   for nom in (parametre_y, parametre_x)}
+        resultats = self.sensitivity_sweep([entite], grilles, annee)[indicateur][0]
+        return pd.DataFrame(resultats, index=grilles[parametre_y], columns=grilles[parametre_x])
+    
+    def load_defense_data(self, pays_composante):
+        """Charge les données via le cache partagé (clé : sélection + version de configuration)"""
+        stats = get_cache_stats()
+        with stats['verrou']:
+            stats['appels'] += 1
+        return cached_defense_data(pays_composante, self.config_version(pays_composante),
+                                   self.source.version())
+    
+    def wait_for_data(self, selection):
+        """Charge la sélection dans le rerun, sans attendre derrière les précalculs en file"""
+        # Les précalculs de la sélection précédente qui n'ont pas démarré sont annulés ;
+        # celui de la sélection, s'il a démarré, est attendu plutôt que refait
+        worker = get_background_worker()
+        worker.cancel_speculative(get_session_id())
+        future = worker.get(('donnees', selection, self.config_version(selection), self.source.version()))
+        if future is not None and future.done():
+            return future.result()[0]
+        with st.spinner(f"⏳ Calcul des indicateurs : {selection}..."):
+            if future is not None and future.running():
+                return future.result()[0]
+            return self.load_defense_data(selection)[0]
+    
+    def likely_next_selections(self, selection):
+        """Sélections probables après celle-ci : pays voisins dans la liste, UE-27, composantes"""
+        candidats = []
+        if selection in self.pays_options:
+            position = self.pays_options.index(selection)
+            candidats += self.pays_options[max(position - 1, 0):position + 2]
+        candidats += ['UE-27'] + self.composantes_options
+        return [entite for entite in dict.fromkeys(candidats) if entite != selection]
+    
+    def prefetch(self, selections):
+        """Soumet au pool de fond le chargement spéculatif des sélections données"""
+        worker = get_background_worker()
+        session = get_session_id()
+        for entite in selections:
+            worker.submit(('donnees', entite, self.config_version(entite), self.source.version()),
+                          lambda entite=entite: self.load_defense_data(entite), session=session)
     
     def get_config(self, pays_composante):
         """Retourne la configuration pour un pays/composante donné"""
-        # Configuration simplifiée pour le dashboard
-        configs = {
-            "France": {
-                "type": "pays_ue",
-                "budget_base": 40.0,
-                "personnel_base": 205000,
-                "projets_pesco_base": 15,
-                "specialisations": ["force_nucleaire", "intervention_rapide", "renseignement"]
-            },
-            "Allemagne": {
-                "type": "pays_ue", 
-                "budget_base": 45.0,
-                "personnel_base": 180000,
-                "projets_pesco_base": 18,
-                "specialisations": ["blindes", "logistique", "cyberdefense"]
-            },
-            "UE-27": {
-                "type": "union",
-                "budget_base": 220.0,
-                "personnel_base": 1450000,
-                "projets_pesco_base": 60,
-                "specialisations": ["defense_collective", "reaction_rapide", "cyberdefense"]
-            },
-            "Forces Terrestres": {
-                "type": "composante",
-                "personnel_base": 850000
-            },
-            "Forces Maritimes": {
-                "type": "composante", 
-                "personnel_base": 250000
-            },
-            "Forces Aeriennes": {
-                "type": "composante",
-                "personnel_base": 350000
-            }
-        }
-        
-        return configs.get(pays_composante, {
-            "type": "pays_ue",
-            "budget_base": 8.0,
-            "personnel_base": 50000,
-            "projets_pesco_base": 4,
-            "specialisations": ["defense_generique"]
-        })
+        return self.registry.get(pays_composante)
+    
+    def config_version(self, entite):
+        """Empreinte des configurations dont dépendent les données d'une entité"""
+        if self.get_config(entite)['type'] == 'union':
+            return self.registry.entities_digest(self.member_states())
+        return self.registry.entities_digest([entite])
     
     def simulate_budget(self, annees, config):
         """Simule l'évolution du budget défense"""
-        budget_base = config.get('budget_base', 10.0)
-        return [budget_base * (1 + 0.03 * (annee - 2017)) for annee in annees]
+        budget_base = config.get('budget_base', DEFAUTS_SIMULATION['budget_base'])
+        croissance = config.get('croissance_budget', DEFAUTS_SIMULATION['croissance_budget'])
+        return budget_base * (1 + croissance * (np.asarray(annees) - 2017))
     
     def simulate_personnel(self, annees, config):
         """Simule l'évolution des effectifs"""
-        personnel_base = config.get('personnel_base', 50000)
-        return [personnel_base * (1 - 0.005 * (annee - 2017)) for annee in annees]
+        personnel_base = config.get('personnel_base', DEFAUTS_SIMULATION['personnel_base'])
+        evolution = config.get('evolution_personnel', DEFAUTS_SIMULATION['evolution_personnel'])
+        return personnel_base * (1 + evolution * (np.asarray(annees) - 2017))
     
     def simulate_pesco_projects(self, annees, config):
         """Simule les projets PESCO"""
-        base = config.get('projets_pesco_base', 5)
-        projects = []
-        for annee in annees:
-            if annee < 2017:
-                projects.append(0)
-            elif annee < 2020:
-                projects.append(base * (annee - 2016) // 3)
-            elif annee < 2023:
-                projects.append(base + 2 * (annee - 2019))
-            else:
-                projects.append(base + 6 + 3 * (annee - 2022))
-        return projects
+        base = config.get('projets_pesco_base', DEFAUTS_SIMULATION['projets_pesco_base'])
+        annees = np.asarray(annees)
+        # Courbe par morceaux : montée en charge (2017-2019), consolidation, accélération (2023+)
+        return np.select(
+            [annees < 2017, annees < 2020, annees < 2023],
+            [0, base * (annees - 2016) // 3, base + 2 * (annees - 2019)],
+            default=base + 6 + 3 * (annees - 2022)
+        )
     
-    def simulate_interoperability(self, annees):
+    def simulate_interoperability(self, annees, config=None):
         """Simule l'interopérabilité"""
-        return [min(45 + 8 * (annee - 2017), 95) for annee in annees]
+        plafond = (config or {}).get('plafond_interoperabilite',
+                                     DEFAUTS_SIMULATION['plafond_interoperabilite'])
+        return np.minimum(45 + 8 * (np.asarray(annees) - 2017), plafond)
     
     def simulate_projection_capacity(self, annees):
         """Simule la capacité de projection"""
-        return [min(30 + 7 * (annee - 2017), 95) for annee in annees]
+        return np.minimum(30 + 7 * (np.asarray(annees) - 2017), 95)
     
-    def simulate_reaction_time(self, annees):
+    def simulate_reaction_time(self, annees, config=None):
         """Simule le temps de réaction"""
-        return [max(30 - 2 * (annee - 2017), 7) for annee in annees]
+        plancher = (config or {}).get('plancher_temps_reaction',
+                                      DEFAUTS_SIMULATION['plancher_temps_reaction'])
+        return np.maximum(30 - 2 * (np.asarray(annees) - 2017), plancher)
     
     def simulate_economies(self, annees, config):
         """Simule les économies d'échelle"""
-        base = 0.5 if config['type'] == 'pays_ue' else 2.0
-        return [base * (annee - 2016) * 0.8 for annee in annees if annee >= 2017] + [0] * (2017 - min(annees))
+        annees = np.asarray(annees)
+        base = np.where(np.asarray(config['type']) == 'pays_ue', 0.5, 2.0)
+        return np.where(annees >= 2017, base * (annees - 2016) * 0.8, 0.0)
     
     def simulate_joint_exercises(self, annees):
         """Simule les exercices communs"""
-        return [10 + 3 * (annee - 2017) for annee in annees]
+        return 10 + 3 * (np.asarray(annees) - 2017)
     
-    def simulate_interoperable_equipment(self, annees):
+    def simulate_interoperable_equipment(self, annees, config=None):
         """Simule les équipements interopérables"""
-        return [min(25 + 10 * (annee - 2017), 90) for annee in annees]
+        plafond = (config or {}).get('plafond_equipements', DEFAUTS_SIMULATION['plafond_equipements'])
+        return np.minimum(25 + 10 * (np.asarray(annees) - 2017), plafond)
     
     def simulate_cyber_capacity(self, annees):
         """Simule la capacité cyber"""
-        return [min(40 + 8 * (annee - 2017), 95) for annee in annees]
+        return np.minimum(40 + 8 * (np.asarray(annees) - 2017), 95)
     
     def simulate_intelligence_sharing(self, annees):
         """Simule le partage de renseignement"""
-        return [min(30 + 9 * (annee - 2017), 95) for annee in annees]
+        return np.minimum(30 + 9 * (np.asarray(annees) - 2017), 95)
     
     def display_header(self):
         """Affiche l'en-tête du dashboard"""
@@ -233,79 +611,200 @@ class DefenseEuropeenneDashboard:
         # Sélection du type d'analyse
         type_analyse = st.sidebar.radio(
             "Type d'analyse:",
-            ["Pays de l'UE", "Composantes militaires", "UE-27 Global"]
+            ["Pays de l'UE", "Composantes militaires", "UE-27 Global", "Comparaison multi-entités"],
+            key='type_analyse'
         )
         
-        if type_analyse == "Pays de l'UE":
-            selection = st.sidebar.selectbox("Sélectionnez un pays:", self.pays_options[:-1])  # Exclure UE-27
-        elif type_analyse == "Composantes militaires":
-            selection = st.sidebar.selectbox("Sélectionnez une composante:", self.composantes_options)
-        else:
-            selection = "UE-27"
-        
-        # Options d'affichage
-        st.sidebar.markdown("### 📊 Options de visualisation")
-        show_projection = st.sidebar.checkbox("Afficher les projections 2023-2027", value=True)
-        compare_before_after = st.sidebar.checkbox("Comparaison avant/après PESCO", value=True)
+        # Sélection et options : appliquées au clic sur « Appliquer », conservées dans la session
+        with st.sidebar.form('controles_analyse'):
+            if type_analyse == "Pays de l'UE":
+                selection = st.selectbox("Sélectionnez un pays:", self.pays_options[:-1],  # Exclure UE-27
+                                         key='selection_pays')
+            elif type_analyse == "Composantes militaires":
+                selection = st.selectbox("Sélectionnez une composante:", self.composantes_options,
+                                         key='selection_composante')
+            elif type_analyse == "UE-27 Global":
+                selection = "UE-27"
+            else:
+                selection = tuple(st.multiselect(
+                    "Entités à comparer:", self.pays_options + self.composantes_options,
+                    default=self.pays_options, key='selection_comparaison'
+                ))
+            
+            # Options d'affichage
+            st.markdown("### 📊 Options de visualisation")
+            show_projection = st.checkbox("Afficher les projections 2023-2027", value=True,
+                                          key='show_projection')
+            compare_before_after = st.checkbox("Comparaison avant/après PESCO", value=True,
+                                               key='compare_before_after')
+            show_uncertainty = st.checkbox("Bandes d'incertitude (Monte Carlo)", value=True,
+                                           key='show_uncertainty')
+            st.form_submit_button("Appliquer", type='primary')
         
-        return {
+        st.session_state['controles'] = {
             'selection': selection,
             'type_analyse': type_analyse,
             'show_projection': show_projection,
-            'compare_before_after': compare_before_after
+            'compare_before_after': compare_before_after,
+            'show_uncertainty': show_uncertainty
+        }
+        return st.session_state['controles']
+    
+    def count_rerun(self, nature):
+        """Compte les reruns de la session : complets, ou limités à un fragment de section"""
+        compteurs = st.session_state.setdefault('reruns', {'complet': 0, 'section': 0})
+        if nature == 'complet':
+            compteurs['complet'] += 1
+            st.session_state['rerun_complet_en_cours'] = True
+        elif not st.session_state.pop('rerun_complet_en_cours', False):
+            compteurs['section'] += 1
+        return compteurs
+    
+    def display_rerun_counter(self):
+        """Affiche les compteurs de reruns de la session"""
+        compteurs = self.count_rerun('section')
+        st.caption(f"🔁 Session : {compteurs['complet']} reruns complets · "
+                   f"{compteurs['section']} reruns de section seule")
+    
+    def display_cache_stats(self):
+        """Affiche les compteurs du cache de données dans la sidebar"""
+        stats = get_cache_stats()
+        with stats['verrou']:
+            appels, echecs, disque = stats['appels'], stats['echecs'], stats['disque']
+        succes = appels - echecs
+        taux = succes / appels * 100 if appels else 0.0
+        st.sidebar.markdown("### ⚡ Cache des données")
+        st.sidebar.caption(f"Succès : {succes} · Échecs : {echecs} · Taux : {taux:.0f}%")
+        if get_disk_cache() is not None:
+            st.sidebar.caption(f"Servis depuis le disque : {disque}")
+        st.sidebar.caption(f"Précalculs en cours : {get_background_worker().pending()}")
+    
+    def display_perf_panel(self):
+        """Panneau d'administration des temps de rerun (masqué sauf ?admin=1)"""
+        if st.query_params.get('admin') != '1' and os.environ.get('DASHBOARD_ADMIN') != '1':
+            return
+        recorder = get_perf_recorder()
+        with st.sidebar.expander("⏱️ Performance (admin)"):
+            stats = recorder.snapshot()
+            if stats:
+                st.dataframe(pd.DataFrame.from_dict(stats, orient='index').round(1), width='stretch')
+            col1, col2 = st.columns(2)
+            if col1.button("Export JSON"):
+                st.caption(recorder.export(os.path.join(PERF_EXPORT_DIR, 'dashboard_perf.json')))
+            if col2.button("Export Prometheus"):
+                st.caption(recorder.export(os.path.join(PERF_EXPORT_DIR, 'dashboard_perf.prom')))
+    
+    def display_pipeline_stats(self, pipeline):
+        """Affiche les étapes du pipeline recalculées lors de ce rerun"""
+        recalculees = ', '.join(pipeline.recalculees) or 'aucune'
+        st.sidebar.caption(f"Étapes recalculées : {recalculees}")
+    
+    def display_payload_stats(self, section):
+        """Affiche la taille des figures envoyées et celle évitée par le rendu paresseux"""
+        tailles = get_payload_stats()
+        tailles[section] = self.payload_octets
+        evites = sum(octets for nom, octets in tailles.items() if nom != section)
+        st.sidebar.caption(f"Figures envoyées : {self.payload_octets / 1024:.1f} Ko · "
+                           f"Évitées : {evites / 1024:.1f} Ko")
+    
+    def display_figure_stats(self):
+        """Affiche les succès du cache de figures et le temps de construction par graphique"""
+        stats = get_figure_cache().snapshot()
+        if stats:
+            with st.sidebar.expander("🧮 Cache des figures"):
+                st.dataframe(pd.DataFrame.from_dict(stats, orient='index'), width='stretch')
+    
+    def plot_chart(self, chart_id, df, builder):
+        """Envoie une figure au navigateur, reconstruite seulement si ses données ont changé"""
+        fig, octets = get_figure_cache().get_or_build(chart_id, frame_digest(df),
+                                                      lambda: builder(df))
+        self.payload_octets += octets
+        with get_perf_recorder().measure('serialisation'):
+            st.plotly_chart(fig, width='stretch')
+    
+    @timed()
+    def compute_derived_metrics(self, df):
+        """Calcule une fois par jeu de données les KPI, cumuls et agrégats de période"""
+        indexe = df.set_index('Annee')
+        # Année de référence : lancement de PESCO (ou première année disponible)
+        annee_reference = 2017 if 2017 in indexe.index else indexe.index[0]
+        derniere_annee = indexe.index.max()
+        
+        actuel = indexe.loc[derniere_annee]
+        reference = indexe.loc[annee_reference]
+        
+        return {
+            'annee_reference': annee_reference,
+            'derniere_annee': derniere_annee,
+            'actuel': actuel,
+            'reference': reference,
+            'evolution_pct': (actuel - reference) / reference * 100,
+            'cumuls': indexe.cumsum(),
+            'moyennes_periode': pd.DataFrame({
+                'avant': indexe[indexe.index < 2017].mean(),
+                'apres': indexe[indexe.index >= 2017].mean()
+            }).T
         }
     
-    def display_key_metrics(self, df, config):
+    def reduce_points(self, df, colonnes):
+        """Sous-échantillonne df (min/max par pixel) lorsque la série dépasse la largeur du graphique"""
+        indices = downsample_indices([df[col].to_numpy() for col in colonnes], LARGEUR_GRAPHIQUE_PX)
+        return df if len(indices) == len(df) else df.iloc[indices]
+    
+    def trace_class(self, n_points):
+        """Trace WebGL au-delà de SEUIL_WEBGL points, SVG sinon"""
+        return go.Scattergl if n_points > SEUIL_WEBGL else go.Scatter
+    
+    def render_mode(self, n_points):
+        """Équivalent de trace_class pour plotly.express"""
+        return 'webgl' if n_points > SEUIL_WEBGL else 'svg'
+    
+    @timed()
+    def display_key_metrics(self, metriques, config):
         """Affiche les métriques clés"""
         st.markdown('<h3 class="section-header">📊 INDICATEURS CLÉS DE PERFORMANCE</h3>', 
                    unsafe_allow_html=True)
         
-        # Calcul des métriques
-        derniere_annee = df['Annee'].max()
-        data_actuelle = df[df['Annee'] == derniere_annee].iloc[0]
-        data_2017 = df[df['Annee'] == 2017].iloc[0]
+        derniere_annee = metriques['derniere_annee']
+        annee_reference = metriques['annee_reference']
+        data_actuelle = metriques['actuel']
+        evolution = metriques['evolution_pct']
         
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            if 'Budget_Defense_Mds' in df.columns:
-                croissance_budget = ((data_actuelle['Budget_Defense_Mds'] - data_2017['Budget_Defense_Mds']) / 
-                                   data_2017['Budget_Defense_Mds']) * 100
+            if 'Budget_Defense_Mds' in data_actuelle.index:
                 st.metric(
-                    "Budget Défense 2027",
+                    f"Budget Défense {derniere_annee}",
                     f"{data_actuelle['Budget_Defense_Mds']:.1f} Md€",
-                    f"{croissance_budget:+.1f}% vs 2017"
+                    f"{evolution['Budget_Defense_Mds']:+.1f}% vs {annee_reference}"
                 )
         
         with col2:
-            if 'Personnel' in df.columns:
-                evolution_personnel = ((data_actuelle['Personnel'] - data_2017['Personnel']) / 
-                                     data_2017['Personnel']) * 100
+            if 'Personnel' in data_actuelle.index:
                 st.metric(
-                    "Effectifs 2027",
+                    f"Effectifs {derniere_annee}",
                     f"{data_actuelle['Personnel']:,.0f}",
-                    f"{evolution_personnel:+.1f}% vs 2017"
+                    f"{evolution['Personnel']:+.1f}% vs {annee_reference}"
                 )
         
         with col3:
-            croissance_interop = ((data_actuelle['Interoperabilite'] - data_2017['Interoperabilite']) / 
-                                data_2017['Interoperabilite']) * 100
             st.metric(
-                "Interopérabilité 2027",
+                f"Interopérabilité {derniere_annee}",
                 f"{data_actuelle['Interoperabilite']:.1f}%",
-                f"{croissance_interop:+.1f}% vs 2017"
+                f"{evolution['Interoperabilite']:+.1f}% vs {annee_reference}"
             )
         
         with col4:
-            reduction_temps = ((data_2017['Temps_Reaction_Jours'] - data_actuelle['Temps_Reaction_Jours']) / 
-                             data_2017['Temps_Reaction_Jours']) * 100
+            reduction_temps = -evolution['Temps_Reaction_Jours']
             st.metric(
-                "Temps de Réaction 2027",
+                f"Temps de Réaction {derniere_annee}",
                 f"{data_actuelle['Temps_Reaction_Jours']:.1f} jours",
-                f"{reduction_temps:+.1f}% vs 2017"
+                f"{reduction_temps:+.1f}% vs {annee_reference}"
             )
     
-    def create_budget_analysis(self, df, config):
+    @timed()
+    def create_budget_analysis(self, df, config, eventails=None):
         """Analyse des budgets et effectifs"""
         st.markdown('<h3 class="section-header">💰 ANALYSE BUDGÉTAIRE ET EFFECTIFS</h3>', 
                    unsafe_allow_html=True)
@@ -314,22 +813,119 @@ class DefenseEuropeenneDashboard:
         
         with col1:
             if 'Budget_Defense_Mds' in df.columns:
-                fig = px.line(df, x='Annee', y='Budget_Defense_Mds',
-                             title="Évolution du Budget de Défense (2017-2027)",
-                             labels={'Budget_Defense_Mds': 'Budget (Md€)', 'Annee': 'Année'})
-                fig.update_traces(line=dict(color='#0055A4', width=3))
-                fig.update_layout(height=400)
-                st.plotly_chart(fig, use_container_width=True)
+                self.plot_chart('budget', df, self.build_budget_figure)
         
         with col2:
             if 'Personnel' in df.columns:
-                fig = px.line(df, x='Annee', y='Personnel',
-                             title="Évolution des Effectifs (2017-2027)",
-                             labels={'Personnel': 'Effectifs', 'Annee': 'Année'})
-                fig.update_traces(line=dict(color='#FF0000', width=3))
-                fig.update_layout(height=400)
-                st.plotly_chart(fig, use_container_width=True)
+                self.plot_chart('personnel', df, self.build_personnel_figure)
+        
+        self.create_fan_charts(df, eventails, [
+            ('Budget_Defense_Mds', "Projection du Budget (Md€)", '#0055A4'),
+            ('Personnel', "Projection des Effectifs", '#FF0000')
+        ])
+    
+    @timed()
+    def create_fan_charts(self, df, eventails, graphiques):
+        """Affiche côte à côte les éventails de percentiles Monte Carlo disponibles"""
+        if df['Annee'].max() <= DERNIERE_ANNEE_OBSERVEE:
+            return
+        if isinstance(eventails, Future):
+            if not eventails.done():
+                # Emplacement réservé, rempli par fill_deferred une fois le calcul terminé
+                zone = st.empty()
+                zone.info("⏳ Bandes d'incertitude en cours de calcul...")
+                self.differes.append((zone, lambda: self.create_fan_charts(
+                    df, eventails.result(), graphiques)))
+                return
+            eventails = eventails.result()
+        
+        graphiques = [g for g in graphiques if eventails and g[0] in eventails]
+        if not graphiques:
+            return
+        
+        st.markdown("#### 🎲 Incertitude des projections (Monte Carlo, P5-P95)")
+        for col, (nom, titre, couleur) in zip(st.columns(len(graphiques)), graphiques):
+            with col:
+                self.plot_chart(f'eventail_{nom}_{GRAINE_MONTE_CARLO}', df,
+                                lambda df: self.build_fan_figure(df, eventails[nom], nom,
+                                                                 titre, couleur))
+    
+    def build_figures(self, df, metriques, eventails=None):
+        """Construit toutes les figures d'une entité hors de Streamlit (export, benchmarks)"""
+        graphiques = [
+            ('budget', 'Budget_Defense_Mds' in df.columns, self.build_budget_figure),
+            ('personnel', 'Personnel' in df.columns, self.build_personnel_figure),
+            ('pesco', True, self.build_pesco_figure),
+            ('exercices', True, self.build_exercises_figure),
+            ('capacites', True, self.build_capabilities_figure),
+            ('temps_reaction', True, self.build_reaction_time_figure),
+            ('economies', True, self.build_economies_figure),
+            ('specialisations',
+             any(col in df.columns for col in ['Capacite_Cyber', 'Partage_Renseignement']),
+             self.build_specialisations_figure),
+            ('comparaison', metriques['moyennes_periode'].notna().any(axis=1).all(),
+             lambda df: self.build_comparative_figure(metriques['moyennes_periode']))
+        ]
+        figures = {chart_id: builder(df) for chart_id, condition, builder in graphiques if condition}
+        for nom, percentiles in (eventails or {}).items():
+            figures[f'eventail_{nom}'] = self.build_fan_figure(
+                df, percentiles, nom, f"Projection : {nom.replace('_', ' ')}", '#0055A4'
+            )
+        return figures
+    
+    def build_fan_figure(self, df, percentiles, nom, titre, couleur):
+        """Construit un graphique en éventail (P5-P95, P25-P75, médiane) autour de la série"""
+        indices = downsample_indices([df[nom].to_numpy(), *percentiles], LARGEUR_GRAPHIQUE_PX)
+        annees = df['Annee'].to_numpy()[indices]
+        central = df[nom].to_numpy()[indices]
+        p5, p25, p50, p75, p95 = percentiles[:, indices]
+        Trace = self.trace_class(len(indices))
+        rgb = tuple(int(couleur[i:i + 2], 16) for i in (1, 3, 5))
+        
+        fig = go.Figure()
+        for bas, haut, opacite, libelle in [(p5, p95, 0.15, 'P5-P95'), (p25, p75, 0.3, 'P25-P75')]:
+            fig.add_trace(Trace(x=annees, y=haut, mode='lines', line=dict(width=0),
+                                showlegend=False, hoverinfo='skip'))
+            fig.add_trace(Trace(x=annees, y=bas, mode='lines', line=dict(width=0),
+                                fill='tonexty', name=libelle,
+                                fillcolor=f'rgba({rgb[0]}, {rgb[1]}, {rgb[2]}, {opacite})'))
+        fig.add_trace(Trace(x=annees, y=p50, mode='lines', name='Médiane',
+                            line=dict(color=couleur, width=3)))
+        fig.add_trace(Trace(x=annees, y=central, mode='lines', name='Scénario central',
+                            line=dict(color=couleur, width=1, dash='dash')))
+        
+        fig.update_layout(title=titre,
+                         xaxis_title="Année",
+                         height=400)
+        if nom == 'Temps_Reaction_Jours':
+            fig.update_yaxes(autorange="reversed")
+        return fig
+    
+    def build_budget_figure(self, df):
+        """Construit le graphique d'évolution du budget"""
+        import plotly.express as px  # import différé : coûteux au démarrage à froid
+        df = self.reduce_points(df, ['Budget_Defense_Mds'])
+        fig = px.line(df, x='Annee', y='Budget_Defense_Mds',
+                     title="Évolution du Budget de Défense (2017-2027)",
+                     labels={'Budget_Defense_Mds': 'Budget (Md€)', 'Annee': 'Année'},
+                     render_mode=self.render_mode(len(df)))
+        fig.update_traces(line=dict(color='#0055A4', width=3))
+        fig.update_layout(height=400)
+        return fig
     
+    def build_personnel_figure(self, df):
+        """Construit le graphique d'évolution des effectifs"""
+        import plotly.express as px
+        df = self.reduce_points(df, ['Personnel'])
+        fig = px.line(df, x='Annee', y='Personnel',
+                     title="Évolution des Effectifs (2017-2027)",
+                     labels={'Personnel': 'Effectifs', 'Annee': 'Année'},
+                     render_mode=self.render_mode(len(df)))
+        fig.update_traces(line=dict(color='#FF0000', width=3))
+        fig.update_layout(height=400)
+        return fig
+    
+    @timed()
     def create_cooperation_analysis(self, df, config):
         """Analyse de la coopération européenne"""
         st.markdown('<h3 class="section-header">🤝 COOPÉRATION EUROPÉENNE</h3>', 
@@ -338,22 +934,37 @@ class DefenseEuropeenneDashboard:
         col1, col2 = st.columns(2)
         
         with col1:
-            fig = px.line(df, x='Annee', y='Projets_PESCO',
-                         title="Projets PESCO (2017-2027)",
-                         labels={'Projets_PESCO': 'Nombre de projets', 'Annee': 'Année'})
-            fig.update_traces(line=dict(color='#0055A4', width=3))
-            fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
+            self.plot_chart('pesco', df, self.build_pesco_figure)
         
         with col2:
-            fig = px.line(df, x='Annee', y='Exercices_Communs',
-                         title="Exercices Militaires Communs (2017-2027)",
-                         labels={'Exercices_Communs': "Nombre d'exercices", 'Annee': 'Année'})
-            fig.update_traces(line=dict(color='#009900', width=3))
-            fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
-    
-    def create_capabilities_analysis(self, df, config):
+            self.plot_chart('exercices', df, self.build_exercises_figure)
+    
+    def build_pesco_figure(self, df):
+        """Construit le graphique des projets PESCO"""
+        import plotly.express as px
+        df = self.reduce_points(df, ['Projets_PESCO'])
+        fig = px.line(df, x='Annee', y='Projets_PESCO',
+                     title="Projets PESCO (2017-2027)",
+                     labels={'Projets_PESCO': 'Nombre de projets', 'Annee': 'Année'},
+                     render_mode=self.render_mode(len(df)))
+        fig.update_traces(line=dict(color='#0055A4', width=3))
+        fig.update_layout(height=400)
+        return fig
+    
+    def build_exercises_figure(self, df):
+        """Construit le graphique des exercices communs"""
+        import plotly.express as px
+        df = self.reduce_points(df, ['Exercices_Communs'])
+        fig = px.line(df, x='Annee', y='Exercices_Communs',
+                     title="Exercices Militaires Communs (2017-2027)",
+                     labels={'Exercices_Communs': "Nombre d'exercices", 'Annee': 'Année'},
+                     render_mode=self.render_mode(len(df)))
+        fig.update_traces(line=dict(color='#009900', width=3))
+        fig.update_layout(height=400)
+        return fig
+    
+    @timed()
+    def create_capabilities_analysis(self, df, config, eventails=None):
         """Analyse des capacités opérationnelles"""
         st.markdown('<h3 class="section-header">⚡ CAPACITÉS OPÉRATIONNELLES</h3>', 
                    unsafe_allow_html=True)
@@ -361,38 +972,58 @@ class DefenseEuropeenneDashboard:
         col1, col2 = st.columns(2)
         
         with col1:
-            # Graphique combiné des capacités
-            fig = go.Figure()
-            
-            fig.add_trace(go.Scatter(x=df['Annee'], y=df['Interoperabilite'],
-                                    mode='lines', name='Interopérabilité',
-                                    line=dict(color='#0055A4', width=3)))
-            
-            fig.add_trace(go.Scatter(x=df['Annee'], y=df['Capacite_Projection'],
-                                    mode='lines', name='Capacité de Projection',
-                                    line=dict(color='#FF0000', width=3)))
-            
-            if 'Equipements_Interoperables' in df.columns:
-                fig.add_trace(go.Scatter(x=df['Annee'], y=df['Equipements_Interoperables'],
-                                        mode='lines', name='Équipements Interopérables',
-                                        line=dict(color='#009900', width=3)))
-            
-            fig.update_layout(title="Évolution des Capacités Opérationnelles (2017-2027)",
-                             xaxis_title="Année",
-                             yaxis_title="Niveau (%)",
-                             height=500)
-            st.plotly_chart(fig, use_container_width=True)
+            self.plot_chart('capacites', df, self.build_capabilities_figure)
         
         with col2:
-            # Temps de réaction
-            fig = px.line(df, x='Annee', y='Temps_Reaction_Jours',
-                         title="Temps de Réaction Opérationnel (2017-2027)",
-                         labels={'Temps_Reaction_Jours': 'Jours', 'Annee': 'Année'})
-            fig.update_traces(line=dict(color='#FF6600', width=3))
-            fig.update_layout(height=500)
-            fig.update_yaxes(autorange="reversed")  # Moins de jours = mieux
-            st.plotly_chart(fig, use_container_width=True)
+            self.plot_chart('temps_reaction', df, self.build_reaction_time_figure)
+        
+        self.create_fan_charts(df, eventails, [
+            ('Interoperabilite', "Projection de l'Interopérabilité (%)", '#0055A4'),
+            ('Capacite_Projection', "Projection de la Capacité de Projection (%)", '#FF0000'),
+            ('Temps_Reaction_Jours', "Projection du Temps de Réaction (jours)", '#FF6600')
+        ])
+    
+    def build_capabilities_figure(self, df):
+        """Construit le graphique combiné des capacités"""
+        colonnes = [col for col in ['Interoperabilite', 'Capacite_Projection',
+                                    'Equipements_Interoperables'] if col in df.columns]
+        df = self.reduce_points(df, colonnes)
+        Trace = self.trace_class(len(df))
+        fig = go.Figure()
+        
+        fig.add_trace(Trace(x=df['Annee'], y=df['Interoperabilite'],
+                            mode='lines', name='Interopérabilité',
+                            line=dict(color='#0055A4', width=3)))
+        
+        fig.add_trace(Trace(x=df['Annee'], y=df['Capacite_Projection'],
+                            mode='lines', name='Capacité de Projection',
+                            line=dict(color='#FF0000', width=3)))
+        
+        if 'Equipements_Interoperables' in df.columns:
+            fig.add_trace(Trace(x=df['Annee'], y=df['Equipements_Interoperables'],
+                                mode='lines', name='Équipements Interopérables',
+                                line=dict(color='#009900', width=3)))
+        
+        fig.update_layout(title="Évolution des Capacités Opérationnelles (2017-2027)",
+                         xaxis_title="Année",
+                         yaxis_title="Niveau (%)",
+                         height=500)
+        return fig
     
+    def build_reaction_time_figure(self, df):
+        """Construit le graphique du temps de réaction"""
+        import plotly.express as px
+        df = self.reduce_points(df, ['Temps_Reaction_Jours'])
+        fig = px.line(df, x='Annee', y='Temps_Reaction_Jours',
+                     title="Temps de Réaction Opérationnel (2017-2027)",
+                     labels={'Temps_Reaction_Jours': 'Jours', 'Annee': 'Année'},
+                     render_mode=self.render_mode(len(df)))
+        fig.update_traces(line=dict(color='#FF6600', width=3))
+        fig.update_layout(height=500)
+        fig.update_yaxes(autorange="reversed")  # Moins de jours = mieux
+        return fig
+    
+    @timed()
     def create_efficiency_analysis(self, df, config):
         """Analyse de l'efficacité et des économies"""
         st.markdown('<h3 class="section-header">📈 EFFICACITÉ ET ÉCONOMIES</h3>', 
@@ -401,89 +1032,246 @@ class DefenseEuropeenneDashboard:
         col1, col2 = st.columns(2)
         
         with col1:
-            fig = px.line(df, x='Annee', y='Economies_Echelle_Mds',
-                         title="Économies d'Échelle Réalisées (2017-2027)",
-                         labels={'Economies_Echelle_Mds': 'Économies (Md€)', 'Annee': 'Année'})
-            fig.update_traces(line=dict(color='#009900', width=3))
-            fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
+            self.plot_chart('economies', df, self.build_economies_figure)
         
         with col2:
             # Graphique des spécialisations
-            special_data = []
-            for col in ['Capacite_Cyber', 'Partage_Renseignement']:
-                if col in df.columns:
-                    special_data.append(col)
-            
-            if special_data:
-                fig = go.Figure()
-                colors = ['#0055A4', '#FF0000', '#FFCC00']
-                
-                for i, col in enumerate(special_data):
-                    nom = col.replace('_', ' ').title()
-                    fig.add_trace(go.Scatter(x=df['Annee'], y=df[col],
-                                            mode='lines', name=nom,
-                                            line=dict(color=colors[i % len(colors)], width=3)))
-                
-                fig.update_layout(title="Capacités Spécialisées (2017-2027)",
-                                 xaxis_title="Année",
-                                 yaxis_title="Niveau (%)",
-                                 height=400)
-                st.plotly_chart(fig, use_container_width=True)
-    
-    def create_comparative_analysis(self, df, config):
+            if any(col in df.columns for col in ['Capacite_Cyber', 'Partage_Renseignement']):
+                self.plot_chart('specialisations', df, self.build_specialisations_figure)
+    
+    def build_economies_figure(self, df):
+        """Construit le graphique des économies d'échelle"""
+        import plotly.express as px
+        df = self.reduce_points(df, ['Economies_Echelle_Mds'])
+        fig = px.line(df, x='Annee', y='Economies_Echelle_Mds',
+                     title="Économies d'Échelle Réalisées (2017-2027)",
+                     labels={'Economies_Echelle_Mds': 'Économies (Md€)', 'Annee': 'Année'},
+                     render_mode=self.render_mode(len(df)))
+        fig.update_traces(line=dict(color='#009900', width=3))
+        fig.update_layout(height=400)
+        return fig
+    
+    def build_specialisations_figure(self, df):
+        """Construit le graphique des capacités spécialisées"""
+        special_data = []
+        for col in ['Capacite_Cyber', 'Partage_Renseignement']:
+            if col in df.columns:
+                special_data.append(col)
+        
+        df = self.reduce_points(df, special_data)
+        Trace = self.trace_class(len(df))
+        fig = go.Figure()
+        colors = ['#0055A4', '#FF0000', '#FFCC00']
+        
+        for i, col in enumerate(special_data):
+            nom = col.replace('_', ' ').title()
+            fig.add_trace(Trace(x=df['Annee'], y=df[col],
+                                mode='lines', name=nom,
+                                line=dict(color=colors[i % len(colors)], width=3)))
+        
+        fig.update_layout(title="Capacités Spécialisées (2017-2027)",
+                         xaxis_title="Année",
+                         yaxis_title="Niveau (%)",
+                         height=400)
+        return fig
+    
+    @timed()
+    def create_comparative_analysis(self, df, config, metriques):
         """Analyse comparative avant/après intégration"""
         st.markdown('<h3 class="section-header">📊 ANALYSE COMPARATIVE</h3>', 
                    unsafe_allow_html=True)
         
-        # Calcul des moyennes avant et après 2017 (lancement PESCO)
-        avant_2017 = df[df['Annee'] < 2017]
-        apres_2017 = df[df['Annee'] >= 2017]
+        # Moyennes avant et après 2017 (lancement PESCO)
+        if metriques['moyennes_periode'].notna().any(axis=1).all():
+            self.plot_chart('comparaison', df,
+                            lambda df: self.build_comparative_figure(metriques['moyennes_periode']))
+    
+    def build_comparative_figure(self, moyennes):
+        """Construit le graphique de comparaison avant/après PESCO"""
+        indicateurs = ['Interoperabilite', 'Capacite_Projection', 'Projets_PESCO']
+        noms = ['Interopérabilité', 'Capacité Projection', 'Projets PESCO']
         
-        if len(avant_2017) > 0 and len(apres_2017) > 0:
-            indicateurs = ['Interoperabilite', 'Capacite_Projection', 'Projets_PESCO']
-            noms = ['Interopérabilité', 'Capacité Projection', 'Projets PESCO']
-            
-            valeurs_avant = [avant_2017[ind].mean() for ind in indicateurs]
-            valeurs_apres = [apres_2017[ind].mean() for ind in indicateurs]
-            
-            fig = go.Figure()
-            
-            fig.add_trace(go.Bar(name='Avant 2017', x=noms, y=valeurs_avant,
-                                marker_color='#0055A4'))
-            fig.add_trace(go.Bar(name='Après 2017', x=noms, y=valeurs_apres,
-                                marker_color='#FF0000'))
-            
-            fig.update_layout(title="Comparaison Avant/Après Lancement de PESCO",
-                             barmode='group',
-                             height=500)
-            st.plotly_chart(fig, use_container_width=True)
+        valeurs_avant = moyennes.loc['avant', indicateurs].tolist()
+        valeurs_apres = moyennes.loc['apres', indicateurs].tolist()
+        
+        fig = go.Figure()
+        
+        fig.add_trace(go.Bar(name='Avant 2017', x=noms, y=valeurs_avant,
+                            marker_color='#0055A4'))
+        fig.add_trace(go.Bar(name='Après 2017', x=noms, y=valeurs_apres,
+                            marker_color='#FF0000'))
+        
+        fig.update_layout(title="Comparaison Avant/Après Lancement de PESCO",
+                         barmode='group',
+                         height=500)
+        return fig
+    
+    @timed()
+    def create_sensitivity_analysis(self, selection):
+        """Sensibilité des indicateurs clés aux paramètres de croissance des simulateurs"""
+        st.markdown('<h3 class="section-header">🎚️ ANALYSE DE SENSIBILITÉ</h3>', 
+                   unsafe_allow_html=True)
+        
+        annee = int(self.analysis_period()[-1])
+        parametres = list(PLAGES_SENSIBILITE)
+        indicateur = st.selectbox("Indicateur clé:", INDICATEURS_CLES,
+                                  format_func=lambda nom: nom.replace('_', ' '))
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            effets = self.sensitivity_effects(selection, annee)
+            effets = effets[effets['Indicateur'] == indicateur].reset_index(drop=True)
+            self.plot_chart(f'tornade_{indicateur}', effets,
+                            lambda df: self.build_tornado_figure(df, indicateur, annee))
+        
+        with col2:
+            parametre_x = st.selectbox("Paramètre (axe horizontal):", parametres)
+            parametre_y = st.selectbox("Paramètre (axe vertical):",
+                                       [nom for nom in parametres if nom != parametre_x])
+            grille = self.sensitivity_grid(selection, parametre_x, parametre_y, indicateur, annee)
+            self.plot_chart(f'sensibilite_{indicateur}_{parametre_x}_{parametre_y}', grille,
+                            lambda df: self.build_heatmap_figure(df, parametre_x, parametre_y,
+                                                                 indicateur, annee))
+    
+    def build_tornado_figure(self, effets, indicateur, annee):
+        """Construit le diagramme en tornade : écart à la référence pour chaque paramètre seul"""
+        effets = effets.assign(ecart_bas=effets['bas'] - effets['reference'],
+                               ecart_haut=effets['haut'] - effets['reference'])
+        # Les paramètres les plus influents en haut du diagramme
+        effets = effets.iloc[(effets['ecart_haut'] - effets['ecart_bas']).abs().argsort()]
+        noms = effets['Parametre'].str.replace('_', ' ')
+        
+        fig = go.Figure()
+        fig.add_trace(go.Bar(name='Valeur basse', y=noms, x=effets['ecart_bas'], orientation='h',
+                             customdata=effets['valeur_bas'], marker_color='#0055A4',
+                             hovertemplate='%{y} = %{customdata}<br>écart : %{x:.3g}<extra></extra>'))
+        fig.add_trace(go.Bar(name='Valeur haute', y=noms, x=effets['ecart_haut'], orientation='h',
+                             customdata=effets['valeur_haut'], marker_color='#FF0000',
+                             hovertemplate='%{y} = %{customdata}<br>écart : %{x:.3g}<extra></extra>'))
+        fig.update_layout(title=f"Sensibilité : {indicateur.replace('_', ' ')} {annee} "
+                                f"(référence {effets['reference'].iloc[0]:,.1f})",
+                         xaxis_title="Écart à la référence",
+                         barmode='overlay',
+                         height=500)
+        return fig
     
-    def create_strategic_insights(self, df, config, selection):
+    def build_heatmap_figure(self, grille, parametre_x, parametre_y, indicateur, annee):
+        """Construit la carte de chaleur d'un indicateur sur une grille de deux paramètres"""
+        fig = go.Figure(go.Heatmap(z=grille.to_numpy(), x=grille.columns, y=grille.index,
+                                   colorscale='Blues',
+                                   colorbar=dict(title=indicateur.replace('_', ' '))))
+        fig.update_layout(title=f"{indicateur.replace('_', ' ')} {annee}",
+                         xaxis_title=parametre_x.replace('_', ' '),
+                         yaxis_title=parametre_y.replace('_', ' '),
+                         height=500)
+        return fig
+    
+    @timed()
+    def generate_comparison_data(self, entites, annees=None):
+        """Génère au format long (entité × année × indicateur) les données de plusieurs entités"""
+        if annees is None:
+            annees = self.analysis_period()
+        annees = np.asarray(annees)
+        data, _ = self.simulate_batch(entites, annees)
+        
+        indicateurs = list(data)
+        # (entités, années, indicateurs) aplati dans l'ordre entité → année → indicateur
+        valeurs = np.stack([data[nom] for nom in indicateurs], axis=-1)
+        valeurs = valeurs.astype(TYPE_INDICATEUR_DEFAUT)
+        n_entites, n_annees, n_indicateurs = valeurs.shape
+        
+        df_long = pd.DataFrame({
+            'Entite': pd.Categorical.from_codes(
+                np.repeat(np.arange(n_entites), n_annees * n_indicateurs),
+                categories=list(entites)
+            ),
+            'Annee': np.tile(np.repeat(annees, n_indicateurs), n_entites)
+                       .astype(self.year_dtype(annees)),
+            'Indicateur': pd.Categorical.from_codes(
+                np.tile(np.arange(n_indicateurs), n_entites * n_annees), categories=indicateurs
+            ),
+            'Valeur': valeurs.ravel()
+        })
+        # Les spécialisations absentes d'une entité ne sont pas représentées
+        return df_long[df_long['Valeur'].notna()].reset_index(drop=True)
+    
+    @timed()
+    def create_comparison_analysis(self, scenarios):
+        """Comparaison de plusieurs entités sur un même indicateur"""
+        st.markdown('<h3 class="section-header">⚖️ COMPARAISON MULTI-ENTITÉS</h3>', 
+                   unsafe_allow_html=True)
+        
+        indicateur = st.selectbox("Indicateur:", scenarios.indicateurs)
+        derniere_annee = scenarios.derniere_annee
+        # Seule la tranche de l'indicateur choisi est lue depuis le fichier mappé
+        tranche = scenarios.indicator_slice(indicateur)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            self.plot_chart(f'comparaison_barres_{indicateur}', tranche,
+                            lambda df: self.build_comparison_bar_figure(df, indicateur, derniere_annee))
+        
+        with col2:
+            self.plot_chart(f'comparaison_lignes_{indicateur}', tranche,
+                            lambda df: self.build_comparison_line_figure(df, indicateur))
+        
+        # Tableau de classement (triable en cliquant sur les en-têtes)
+        st.markdown(f"#### 🏆 CLASSEMENT {derniere_annee}")
+        classement = scenarios.ranking(derniere_annee).sort_values(indicateur, ascending=False)
+        classement.index = classement.index.astype(str)
+        classement.columns = classement.columns.astype(str)
+        st.dataframe(classement, width='stretch')
+    
+    def build_comparison_bar_figure(self, tranche, indicateur, annee):
+        """Construit le graphique en barres d'un indicateur pour toutes les entités"""
+        donnees = tranche[tranche['Annee'] == annee].sort_values('Valeur', ascending=False)
+        fig = go.Figure(go.Bar(x=donnees['Entite'].astype(str), y=donnees['Valeur'],
+                               marker_color='#0055A4'))
+        fig.update_layout(title=f"{indicateur.replace('_', ' ')} ({annee})",
+                         xaxis_title="Entité",
+                         yaxis_title="Valeur",
+                         height=500)
+        return fig
+    
+    def build_comparison_line_figure(self, tranche, indicateur):
+        """Construit les courbes d'un indicateur, une par entité"""
+        fig = go.Figure()
+        for entite, groupe in tranche.groupby('Entite', observed=True):
+            fig.add_trace(go.Scatter(x=groupe['Annee'], y=groupe['Valeur'],
+                                    mode='lines', name=str(entite)))
+        fig.update_layout(title=f"Évolution : {indicateur.replace('_', ' ')}",
+                         xaxis_title="Année",
+                         yaxis_title="Valeur",
+                         height=500)
+        return fig
+    
+    @timed()
+    def create_strategic_insights(self, metriques, config, selection):
         """Génère des insights stratégiques"""
         st.markdown('<h3 class="section-header">💡 INSIGHTS STRATÉGIQUES</h3>', 
                    unsafe_allow_html=True)
         
-        # Calcul des indicateurs de performance
-        croissance_interop = ((df['Interoperabilite'].iloc[-1] - df['Interoperabilite'].iloc[0]) / 
-                            df['Interoperabilite'].iloc[0]) * 100
-        
-        reduction_temps = ((df['Temps_Reaction_Jours'].iloc[0] - df['Temps_Reaction_Jours'].iloc[-1]) / 
-                         df['Temps_Reaction_Jours'].iloc[0]) * 100
+        # Indicateurs de performance issus des métriques dérivées
+        evolution = metriques['evolution_pct']
+        actuel = metriques['actuel']
+        annee_reference = metriques['annee_reference']
+        reduction_temps = -evolution['Temps_Reaction_Jours']
         
         col1, col2 = st.columns(2)
         
         with col1:
             st.markdown("#### 🎯 PERFORMANCES CLÉS")
             st.markdown(f"""
-            - **Interopérabilité**: +{croissance_interop:.1f}% depuis 2017
-            - **Temps de réaction**: -{reduction_temps:.1f}% depuis 2017  
-            - **Projets PESCO**: {df['Projets_PESCO'].iloc[-1]:.0f} projets actifs
-            - **Exercices communs**: {df['Exercices_Communs'].iloc[-1]:.0f} par an
+            - **Interopérabilité**: +{evolution['Interoperabilite']:.1f}% depuis {annee_reference}
+            - **Temps de réaction**: -{reduction_temps:.1f}% depuis {annee_reference}  
+            - **Projets PESCO**: {actuel['Projets_PESCO']:.0f} projets actifs
+            - **Exercices communs**: {actuel['Exercices_Communs']:.0f} par an
             """)
             
-            if 'Economies_Echelle_Mds' in df.columns:
-                economies_totales = df['Economies_Echelle_Mds'].sum()
+            if 'Economies_Echelle_Mds' in actuel.index:
+                economies_totales = metriques['cumuls']['Economies_Echelle_Mds'].iloc[-1]
                 st.markdown(f"- **Économies réalisées**: {economies_totales:.1f} Md€")
         
         with col2:
@@ -519,84 +1307,202 @@ class DefenseEuropeenneDashboard:
                 for spec in specialisations:
                     st.markdown(f"- {spec.replace('_', ' ').title()}")
     
+    @timed()
     def create_european_overview(self):
         """Vue d'ensemble européenne"""
         st.markdown('<h3 class="section-header">🌍 VUE D\'ENSEMBLE EUROPÉENNE</h3>', 
                    unsafe_allow_html=True)
         
-        # Données comparatives des principaux pays
+        # Dernière année des principaux pays et de l'agrégat UE-27 (somme de ses membres)
         pays_principaux = ["France", "Allemagne", "Italie", "Espagne", "Pologne", "UE-27"]
+        derniers = pd.DataFrame({pays: self.load_defense_data(pays)[0].iloc[-1]
+                                 for pays in pays_principaux}).T
+        annee = int(derniers['Annee'].iloc[0])
         
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            st.markdown("#### 💰 BUDGETS DÉFENSE 2027")
-            budgets = {
-                "France": 52.3, "Allemagne": 58.5, "Italie": 32.5, 
-                "Espagne": 23.4, "Pologne": 15.6, "UE-27": 285.0
-            }
+            st.markdown(f"#### 💰 BUDGETS DÉFENSE {annee}")
+            budgets = derniers['Budget_Defense_Mds']
             for pays, budget in budgets.items():
-                st.progress(budget/max(budgets.values()), text=f"{pays}: {budget} Md€")
+                st.progress(budget/budgets.max(), text=f"{pays}: {budget:.1f} Md€")
         
         with col2:
             st.markdown("#### 👥 EFFECTIFS MILITAIRES")
-            effectifs = {
-                "France": 205000, "Allemagne": 180000, "Italie": 165000,
-                "Espagne": 124000, "Pologne": 115000, "UE-27": 1420000
-            }
+            effectifs = derniers['Personnel']
             for pays, eff in effectifs.items():
-                st.progress(eff/max(effectifs.values()), text=f"{pays}: {eff:,}")
+                st.progress(eff/effectifs.max(), text=f"{pays}: {eff:,.0f}")
         
         with col3:
             st.markdown("#### 🤝 PROJETS PESCO")
-            projets = {
-                "France": 15, "Allemagne": 18, "Italie": 12,
-                "Espagne": 10, "Pologne": 8, "UE-27": 60
-            }
+            projets = derniers['Projets_PESCO']
             for pays, proj in projets.items():
-                st.progress(proj/max(projets.values()), text=f"{pays}: {proj} projets")
+                st.progress(proj/projets.max(), text=f"{pays}: {proj:.0f} projets")
+        
+        # Total des composantes, agrégé de la même façon que l'UE-27
+        composantes = self.rollup([self.load_defense_data(composante)[0]
+                                   for composante in self.composantes_options]).iloc[-1]
+        st.caption(f"Composantes militaires ({', '.join(self.composantes_options)}) : "
+                   f"{composantes['Personnel']:,.0f} personnels en {annee}")
 
+    @timed('rerun')
     def run_dashboard(self):
         """Exécute le dashboard complet"""
+        self.count_rerun('complet')
+        
         # Sidebar
         controls = self.create_sidebar()
+        self.display_perf_panel()
         
         # Header
         self.display_header()
         
-        # Génération des données
-        df, config = self.generate_defense_data(controls['selection'])
+        if controls['type_analyse'] == "Comparaison multi-entités":
+            self.run_comparison(controls['selection'])
+            self.display_figure_stats()
+            return
         
-        # Navigation par onglets
-        tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-            "📊 Vue d'Ensemble", 
-            "💰 Budgets & Effectifs", 
-            "🤝 Coopération", 
-            "⚡ Capacités", 
-            "📈 Efficacité",
-            "🌍 Europe"
-        ])
+        # Pipeline config → données → affichage : seules les étapes dont les entrées
+        # ont changé depuis le dernier rerun de la session sont recalculées
+        pipeline = get_session_pipeline()
+        selection = controls['selection']
+        config = pipeline.stage('config', (selection, self.registry.empreinte),
+                                lambda: self.get_config(selection))
+        donnees = pipeline.stage('donnees', (pipeline.version('config'), self.source.version()),
+                                 lambda: self.wait_for_data(selection))
+        df = pipeline.stage('affichage', (pipeline.version('donnees'), controls['show_projection']),
+                            lambda: self.filter_projection(donnees, controls['show_projection']))
+        metriques = pipeline.stage('metriques', (pipeline.version('affichage'),), lambda: cached_on_disk(
+            ('metriques', selection, self.config_version(selection), self.source.version(),
+             controls['show_projection']),
+            lambda: self.compute_derived_metrics(df)
+        ))
+        eventails = None
+        # Sans années de projection affichées, toutes les trajectoires suivraient la série
+        if controls['show_uncertainty'] and df['Annee'].max() > DERNIERE_ANNEE_OBSERVEE:
+            # Calculé en fond : les sections s'affichent sans attendre les éventails
+            eventails = pipeline.stage(
+                'monte_carlo', (pipeline.version('affichage'), GRAINE_MONTE_CARLO),
+                lambda: get_background_worker().submit(
+                    ('monte_carlo', frame_digest(df), self.config_version(selection), GRAINE_MONTE_CARLO),
+                    lambda: simulate_monte_carlo(df, n_trajectoires=5000, graine=GRAINE_MONTE_CARLO,
+                                                 config=config)
+                )
+            )
+        # Après les éventails de la sélection, pour ne pas les faire attendre en file
+        if 'donnees' in pipeline.recalculees:
+            self.prefetch(self.likely_next_selections(selection))
+        self.display_cache_stats()
+        self.display_pipeline_stats(pipeline)
         
-        with tab1:
+        self.run_section(df, config, metriques, controls, eventails)
+        self.display_payload_stats(st.session_state['section'])
+        self.display_figure_stats()
+    
+    @st.fragment
+    @timed('rerun_section')
+    def run_section(self, df, config, metriques, controls, eventails=None):
+        """Section active, dans un fragment : ses widgets ne relancent ni la sidebar ni le pipeline"""
+        # Navigation par section : seule la section active construit ses figures
+        section = st.radio("Section:", self.sections, horizontal=True,
+                           key='section', label_visibility="collapsed")
+        self.render_section(section, df, config, metriques, controls, eventails)
+        self.fill_deferred()
+        self.display_export(safe_filename(controls['selection']), lambda: self.frame_chunks(df))
+        self.display_rerun_counter()
+    
+    def fill_deferred(self):
+        """Remplit les emplacements réservés à mesure que les calculs de fond aboutissent"""
+        for zone, remplir in self.differes:
+            with zone.container():
+                remplir()
+        self.differes = []
+    
+    def frame_chunks(self, df):
+        """Tranches de TAILLE_BLOC_EXPORT lignes d'un frame (vues, sans copie)"""
+        for debut in range(0, len(df), TAILLE_BLOC_EXPORT):
+            yield df.iloc[debut:debut + TAILLE_BLOC_EXPORT]
+    
+    def export_chunks(self, entites, annees=None):
+        """Format long (entité, année, indicateur, valeur), un bloc par entité"""
+        # Une entité demandée deux fois n'est exportée qu'une fois (catégories uniques)
+        entites = list(dict.fromkeys(entites))
+        for code, entite in enumerate(entites):
+            if annees is None:
+                df, _ = self.load_defense_data(entite)
+            else:
+                df, _ = self.generate_defense_data(entite, annees)
+            indicateurs = list(df.columns.drop('Annee'))
+            n_annees = len(df)
+            valeurs = df[indicateurs].to_numpy(dtype=TYPE_INDICATEUR_DEFAUT).ravel()
+            bloc = pd.DataFrame({
+                'Entite': pd.Categorical.from_codes(np.full(len(valeurs), code),
+                                                    categories=entites),
+                'Annee': np.repeat(df['Annee'].to_numpy(), len(indicateurs)),
+                'Indicateur': pd.Categorical.from_codes(np.tile(np.arange(len(indicateurs)), n_annees),
+                                                        categories=indicateurs),
+                'Valeur': valeurs
+            })
+            yield bloc[bloc['Valeur'].notna()]
+    
+    def display_export(self, nom, blocs):
+        """Bouton de téléchargement ; le fichier n'est produit qu'au clic, bloc par bloc"""
+        with st.expander("⬇️ Exporter les données"):
+            format_ = st.radio("Format:", DataExporter.available_formats(), horizontal=True,
+                               key='format_export')
+            exporteur = DataExporter(format_)
+            st.download_button(
+                f"Télécharger ({format_.upper()})",
+                data=lambda: exporteur.temporary_file(blocs()),
+                file_name=f"{nom}.{format_}",
+                mime=DataExporter.TYPES_MIME[format_],
+                on_click='ignore'
+            )
+    
+    def filter_projection(self, df, show_projection):
+        """Retire les années de projection si elles ne doivent pas être affichées"""
+        if show_projection:
+            return df
+        return df[df['Annee'] <= DERNIERE_ANNEE_OBSERVEE].reset_index(drop=True)
+    
+    @st.fragment
+    @timed('rerun_section')
+    def run_comparison(self, entites):
+        """Exécute le mode comparaison sur plusieurs entités (fragment, comme run_section)"""
+        if not entites:
+            st.info("Sélectionnez au moins une entité à comparer.")
+            # Rerun compté même sans entité, sinon le suivant passe pour un rerun de section
+            self.display_rerun_counter()
+            return
+        # Clé normalisée : les mêmes entités choisies dans un autre ordre partagent le même fichier
+        scenarios = get_scenario_set(tuple(sorted(entites)), self.registry.empreinte,
+                                     self.source.version())
+        self.create_comparison_analysis(scenarios)
+        self.display_export('comparaison', scenarios.chunks)
+        self.display_rerun_counter()
+    
+    def render_section(self, section, df, config, metriques, controls, eventails=None):
+        """Construit uniquement la section demandée"""
+        if section == self.sections[0]:
             st.markdown(f"## 🛡️ Analyse de la Défense - {controls['selection']}")
-            self.display_key_metrics(df, config)
-            self.create_strategic_insights(df, config, controls['selection'])
+            self.display_key_metrics(metriques, config)
+            self.create_strategic_insights(metriques, config, controls['selection'])
         
-        with tab2:
-            self.create_budget_analysis(df, config)
+        elif section == self.sections[1]:
+            self.create_budget_analysis(df, config, eventails)
         
-        with tab3:
+        elif section == self.sections[2]:
             self.create_cooperation_analysis(df, config)
         
-        with tab4:
-            self.create_capabilities_analysis(df, config)
+        elif section == self.sections[3]:
+            self.create_capabilities_analysis(df, config, eventails)
         
-        with tab5:
+        elif section == self.sections[4]:
             self.create_efficiency_analysis(df, config)
             if controls['compare_before_after']:
-                self.create_comparative_analysis(df, config)
+                self.create_comparative_analysis(df, config, metriques)
         
-        with tab6:
+        elif section == self.sections[5]:
             self.create_european_overview()
             
             st.markdown("---")
@@ -617,8 +1523,801 @@ class DefenseEuropeenneDashboard:
             **Objectif**: Mesurer les progrès de l'intégration militaire européenne et identifier 
             les domaines d'amélioration pour une défense européenne plus unie et efficace.
             """)
+        
+        elif section == self.sections[6]:
+            self.create_sensitivity_analysis(controls['selection'])
+
+class FigureCache:
+    """Cache LRU des figures Plotly, borné par la taille sérialisée totale"""
+    
+    def __init__(self, max_octets=64 * 1024 * 1024):
+        self.max_octets = max_octets
+        self.octets = 0
+        self.entrees = OrderedDict()  # (chart_id, empreinte) -> (figure, octets)
+        self.stats = {}
+        self.verrou = threading.Lock()
+    
+    def get_or_build(self, chart_id, empreinte, builder):
+        """Retourne (figure, octets) depuis le cache ou en appelant builder"""
+        cle = (chart_id, empreinte)
+        with self.verrou:
+            stats = self.stats.setdefault(chart_id, {'succes': 0, 'constructions': 0,
+                                                     'duree_ms': 0.0})
+            if cle in self.entrees:
+                self.entrees.move_to_end(cle)
+                stats['succes'] += 1
+                return self.entrees[cle]
+        
+        debut = time.perf_counter()
+        fig = builder()
+        octets = len(fig.to_json())
+        duree = (time.perf_counter() - debut) * 1000
+        
+        with self.verrou:
+            stats['constructions'] += 1
+            stats['duree_ms'] += duree
+            if cle not in self.entrees:
+                self.entrees[cle] = (fig, octets)
+                self.octets += octets
+            # Éviction des figures les moins récemment utilisées
+            while self.octets > self.max_octets and len(self.entrees) > 1:
+                _, (_, taille) = self.entrees.popitem(last=False)
+                self.octets -= taille
+        return fig, octets
+    
+    def snapshot(self):
+        """Copie des compteurs par graphique, avec la durée moyenne de construction"""
+        with self.verrou:
+            return {
+                chart_id: {
+                    'succes': s['succes'],
+                    'constructions': s['constructions'],
+                    'construction_moy_ms': round(s['duree_ms'] / s['constructions'], 1)
+                                           if s['constructions'] else 0.0
+                }
+                for chart_id, s in self.stats.items()
+            }
+
+def frame_digest(df):
+    """Empreinte du contenu d'un DataFrame (colonnes et valeurs)"""
+    empreinte = hashlib.blake2b(digest_size=16)
+    empreinte.update('|'.join(map(str, df.columns)).encode())
+    empreinte.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return empreinte.hexdigest()
+
+def config_bound(borne, config):
+    """Valeur d'une borne Monte Carlo : nombre fixe ou paramètre lu dans la configuration"""
+    if not isinstance(borne, str):
+        return borne
+    return (config or {}).get(borne, DEFAUTS_SIMULATION[borne])
+
+@timed()
+def simulate_monte_carlo(df, n_trajectoires=10000, graine=GRAINE_MONTE_CARLO, flux=0, config=None):
+    """Tire des trajectoires aléatoires autour des séries de df et en retourne les percentiles"""
+    # Un flux aléatoire reproductible par entité d'un même lot ; les trajectoires
+    # suivent la série jusqu'à DERNIERE_ANNEE_OBSERVEE, leur pente est perturbée au-delà
+    rng = np.random.default_rng(np.random.SeedSequence([graine, flux]))
+    annees = df['Annee'].to_numpy()
+    horizon = np.maximum(annees - DERNIERE_ANNEE_OBSERVEE, 0)
+    projection = horizon > 0
+    reference = np.flatnonzero(~projection)
+    
+    eventails = {}
+    for nom, incertitude in INCERTITUDES_MONTE_CARLO.items():
+        if nom not in df.columns:
+            continue
+        central = df[nom].to_numpy(dtype=float)
+        
+        ecart_type = incertitude['ecart_type']
+        if incertitude['echelle'] == 'relatif':
+            ecart_type *= abs(central[reference[-1]]) if len(reference) else abs(central[0])
+        ecarts_pente = rng.normal(0.0, ecart_type, size=(n_trajectoires, 1))
+        trajectoires = central + ecarts_pente * horizon
+        
+        if 'chocs' in incertitude:
+            probabilite, moyenne, dispersion = incertitude['chocs']
+            survenus = rng.random((n_trajectoires, len(annees))) < probabilite
+            chocs = np.where(survenus & projection,
+                             rng.normal(moyenne, dispersion, (n_trajectoires, len(annees))), 0.0)
+            trajectoires *= np.cumprod(1 + chocs, axis=1)
+        
+        # Bornes de l'entité (plafonds surchargés dans sa configuration), élargies à la
+        # série centrale : données réelles ou moyenne d'agrégat ne sont jamais tronquées
+        bas, haut = (config_bound(borne, config) for borne in incertitude['bornes'])
+        if bas is not None:
+            bas = min(bas, central.min())
+        if haut is not None:
+            haut = max(haut, central.max())
+        trajectoires = np.clip(trajectoires, bas, haut)
+        eventails[nom] = np.percentile(trajectoires, PERCENTILES_MONTE_CARLO, axis=0)
+    return eventails
+
+def downsample_indices(series, n_paquets):
+    """Indices min/max de chaque paquet (et extrémités) pour tracer des séries sur n_paquets pixels"""
+    n = len(series[0])
+    if n <= 2 * n_paquets:
+        return np.arange(n)
+    
+    bornes = np.linspace(0, n, n_paquets + 1).astype(int)
+    paquet = np.repeat(np.arange(n_paquets), np.diff(bornes))
+    conserves = [np.array([0, n - 1])]
+    for valeurs in series:
+        valeurs = np.asarray(valeurs, dtype=float)
+        for reduction in (np.minimum, np.maximum):
+            extremes = reduction.reduceat(valeurs, bornes[:-1])
+            candidats = np.flatnonzero(valeurs == extremes[paquet])
+            _, premiers = np.unique(paquet[candidats], return_index=True)
+            conserves.append(candidats[premiers])
+    return np.unique(np.concatenate(conserves))
+
+def _monte_carlo_entity(args):
+    """Tâche d'un processus du pool : génère les données d'une entité puis ses percentiles"""
+    entite, flux, n_trajectoires, graine = args
+    df, config = DefenseEuropeenneDashboard().generate_defense_data(entite)
+    return entite, simulate_monte_carlo(df, n_trajectoires, graine, flux, config)
+
+def run_monte_carlo(entites, n_trajectoires=10000, graine=GRAINE_MONTE_CARLO, max_workers=None):
+    """Exécute le moteur Monte Carlo pour plusieurs entités, réparties sur un pool de processus"""
+    # Flux dérivé de la position : résultat identique quel que soit le nombre de processus
+    taches = [(entite, flux, n_trajectoires, graine) for flux, entite in enumerate(entites)]
+    if max_workers == 1 or len(taches) <= 1:
+        return dict(map(_monte_carlo_entity, taches))
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return dict(pool.map(_monte_carlo_entity, taches))
+
+class Pipeline:
+    """Pipeline conservé dans la session : une étape n'est réévaluée que si ses entrées changent"""
+    
+    def __init__(self):
+        self.etapes = {}  # nom -> (entrées, version, résultat)
+        self.recalculees = []
+    
+    def stage(self, nom, entrees, calcul):
+        """Retourne le résultat de l'étape, recalculé seulement si ses entrées ont changé"""
+        precedent = self.etapes.get(nom)
+        if precedent is not None and precedent[0] == entrees:
+            return precedent[2]
+        
+        version = precedent[1] + 1 if precedent is not None else 0
+        resultat = calcul()
+        self.etapes[nom] = (entrees, version, resultat)
+        self.recalculees.append(nom)
+        return resultat
+    
+    def version(self, nom):
+        """Numéro de version de la dernière évaluation d'une étape"""
+        return self.etapes[nom][1]
+    
+    def start_rerun(self):
+        """Réinitialise la liste des étapes recalculées"""
+        self.recalculees = []
+
+def get_session_id():
+    """Identifiant de la session courante, propriétaire de ses précalculs spéculatifs"""
+    if 'id_session' not in st.session_state:
+        st.session_state['id_session'] = uuid.uuid4().hex
+    return st.session_state['id_session']
+
+def get_session_pipeline():
+    """Pipeline de la session courante, créé au premier rerun"""
+    if 'pipeline' not in st.session_state:
+        st.session_state['pipeline'] = Pipeline()
+    pipeline = st.session_state['pipeline']
+    pipeline.start_rerun()
+    return pipeline
+
+class BackgroundWorker:
+    """Pool de threads partagé par les sessions pour les calculs de fond, une tâche par clé"""
+    
+    def __init__(self, max_workers=PRECALCUL_WORKERS):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='precalcul')
+        self.taches = {}
+        self.speculatives = {}  # clé -> sessions ayant demandé ce précalcul spéculatif
+        self.verrou = threading.RLock()
+    
+    def submit(self, cle, calcul, session=None):
+        """Future de la tâche identifiée par cle, soumise si elle n'est pas déjà en cours"""
+        with self.verrou:
+            future = self.taches.get(cle)
+            nouvelle = future is None
+            if nouvelle:
+                future = self.pool.submit(calcul)
+                self.taches[cle] = future
+            # Spéculative (annulable) seulement si toutes ses demandes viennent de précalculs
+            if session is None:
+                self.speculatives.pop(cle, None)
+            elif nouvelle or cle in self.speculatives:
+                self.speculatives.setdefault(cle, set()).add(session)
+            if nouvelle:
+                # Après l'inscription : une tâche déjà terminée est oubliée dès cet appel
+                future.add_done_callback(lambda termine: self.forget(cle, termine))
+            return future
+    
+    def get(self, cle):
+        """Future de la tâche identifiée par cle si elle est en file ou en cours, sinon None"""
+        with self.verrou:
+            return self.taches.get(cle)
+    
+    def cancel_speculative(self, session):
+        """Annule les précalculs de la session qui n'ont pas démarré et qu'aucune autre n'attend"""
+        with self.verrou:
+            for cle, sessions in list(self.speculatives.items()):
+                sessions.discard(session)
+                if not sessions:
+                    del self.speculatives[cle]
+                    self.taches[cle].cancel()
+    
+    def forget(self, cle, future):
+        """Retire une tâche terminée ou annulée (son résultat vit dans les caches en aval)"""
+        with self.verrou:
+            if self.taches.get(cle) is future:
+                del self.taches[cle]
+                self.speculatives.pop(cle, None)
+    
+    def pending(self):
+        """Nombre de tâches en file ou en cours d'exécution"""
+        with self.verrou:
+            return len(self.taches)
+
+class ConfigRegistry:
+    """Registre des configurations, chargé et validé une fois depuis un fichier JSON versionné"""
+    
+    TYPES = ('pays_ue', 'union', 'composante')
+    CHAMPS_NUMERIQUES = ('budget_base', 'personnel_base', 'projets_pesco_base')
+    CHAMPS_PARAMETRES = ('croissance_budget', 'evolution_personnel', 'plafond_interoperabilite',
+                         'plafond_equipements', 'plancher_temps_reaction')
+    
+    def __init__(self, contenu):
+        self.version = contenu.get('version', '')
+        self.empreinte = hashlib.blake2b(
+            json.dumps(contenu, sort_keys=True).encode(), digest_size=8
+        ).hexdigest()
+        
+        definitions = {**contenu.get('profils', {}), **contenu.get('entites', {})}
+        self.profils = {nom: self.resolve(nom, definitions, ()) for nom in contenu.get('profils', {})}
+        self.entites = {nom: self.resolve(nom, definitions, ()) for nom in contenu.get('entites', {})}
+        
+        defaut = contenu.get('defaut')
+        if defaut not in self.profils:
+            raise ValueError(f"Profil par défaut inconnu : {defaut!r}")
+        self.defaut = self.profils[defaut]
+    
+    @classmethod
+    def load(cls, chemin):
+        """Charge et valide le registre depuis un fichier JSON"""
+        with open(chemin, encoding='utf-8') as f:
+            return cls(json.load(f))
+    
+    def resolve(self, nom, definitions, chaine):
+        """Fusionne une définition avec celles dont elle hérite, puis la valide"""
+        if nom in chaine:
+            raise ValueError(f"Héritage circulaire : {' → '.join(chaine + (nom,))}")
+        if nom not in definitions:
+            raise ValueError(f"Profil ou entité inconnu : {nom!r}")
+        
+        definition = dict(definitions[nom])
+        parent = definition.pop('herite', None)
+        config = self.resolve(parent, definitions, chaine + (nom,)) if parent else {}
+        config.update(definition)
+        self.validate(nom, config)
+        return config
+    
+    def validate(self, nom, config):
+        """Vérifie les types et les valeurs d'une configuration résolue"""
+        inconnus = set(config) - {'type', 'specialisations', *self.CHAMPS_NUMERIQUES,
+                                  *self.CHAMPS_PARAMETRES}
+        if inconnus:
+            raise ValueError(f"{nom} : champs inconnus {sorted(inconnus)}")
+        if config.get('type') not in self.TYPES:
+            raise ValueError(f"{nom} : type {config.get('type')!r} hors de {self.TYPES}")
+        for champ in self.CHAMPS_NUMERIQUES:
+            valeur = config.get(champ, 0)
+            if isinstance(valeur, bool) or not isinstance(valeur, (int, float)) or valeur < 0:
+                raise ValueError(f"{nom} : {champ} doit être un nombre positif")
+        for champ in self.CHAMPS_PARAMETRES:
+            valeur = config.get(champ, 0)
+            if isinstance(valeur, bool) or not isinstance(valeur, (int, float)):
+                raise ValueError(f"{nom} : {champ} doit être un nombre")
+        specialisations = config.get('specialisations', [])
+        if not isinstance(specialisations, list) or not all(isinstance(s, str) for s in specialisations):
+            raise ValueError(f"{nom} : specialisations doit être une liste de chaînes")
+    
+    def get(self, entite):
+        """Configuration résolue d'une entité (profil par défaut si elle est absente)"""
+        return self.entites.get(entite, self.defaut)
+    
+    def entities_digest(self, entites):
+        """Empreinte des configurations résolues des entités données"""
+        contenu = [self.get(entite) for entite in entites]
+        return hashlib.blake2b(json.dumps(contenu, sort_keys=True).encode(),
+                               digest_size=8).hexdigest()
+
+@st.cache_resource(show_spinner=False)
+def get_config_registry(chemin):
+    """Registre des configurations, chargé une seule fois par processus"""
+    return ConfigRegistry.load(chemin)
+
+class DiskCache:
+    """Cache persistant, un fichier par clé dans un répertoire partageable entre processus et répliques"""
+    
+    def __init__(self, repertoire, max_octets):
+        self.path = repertoire
+        self.max_octets = max_octets
+        os.makedirs(repertoire, exist_ok=True)
+    
+    def key(self, elements):
+        """Clé stable à partir d'un tuple d'éléments (entité, empreintes...) et de la version du code"""
+        return hashlib.blake2b(repr((code_version(), elements)).encode(), digest_size=16).hexdigest()
+    
+    def file(self, elements):
+        """Fichier correspondant à une clé"""
+        return os.path.join(self.path, f"{self.key(elements)}.pkl")
+    
+    def get(self, elements):
+        """Valeur en cache ou None"""
+        chemin = self.file(elements)
+        try:
+            with open(chemin, 'rb') as f:
+                valeur = pickle.load(f)
+                modification = os.fstat(f.fileno()).st_mtime
+        except FileNotFoundError:
+            return None
+        # La date de modification sert de date d'utilisation pour l'éviction ; rafraîchie au
+        # plus une fois par DISK_CACHE_ACCES_S, la plupart des lectures n'écrivent rien
+        if time.time() - modification > DISK_CACHE_ACCES_S:
+            try:
+                os.utime(chemin)
+            except FileNotFoundError:
+                pass
+        return valeur
+    
+    def set(self, elements, valeur):
+        """Écrit la valeur puis remplace le fichier atomiquement et évince les plus anciens"""
+        chemin = self.file(elements)
+        descripteur, temporaire = tempfile.mkstemp(suffix='.tmp', dir=self.path)
+        try:
+            with os.fdopen(descripteur, 'wb') as f:
+                pickle.dump(valeur, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.chmod(temporaire, 0o644)
+            os.replace(temporaire, chemin)
+        finally:
+            if os.path.exists(temporaire):
+                os.remove(temporaire)
+        prune_directory(self.path, '.pkl', self.max_octets, chemin)
+
+@functools.lru_cache(maxsize=None)
+def source_digest():
+    """Empreinte de ce fichier : formules, AGREGATION_UNION, types du schéma"""
+    with open(os.path.abspath(__file__), 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+
+def code_version():
+    """Version du code incluse dans les clés persistées (VERSION_SCHEMA, ce fichier, pandas)"""
+    return f"{VERSION_SCHEMA}-{source_digest()}-pandas{pd.__version__}"
+
+def prune_directory(repertoire, extension, max_octets, conserve):
+    """Supprime les fichiers d'extension donnée les plus anciens (mtime) au-delà de max_octets"""
+    fichiers = []
+    for entree in os.scandir(repertoire):
+        if entree.name.endswith(extension) and entree.path != conserve:
+            try:
+                infos = entree.stat()
+            except FileNotFoundError:
+                continue
+            fichiers.append((infos.st_mtime, infos.st_size, entree.path))
+    total = os.path.getsize(conserve) + sum(taille for _, taille, _ in fichiers)
+    for _, taille, chemin in sorted(fichiers):
+        if total <= max_octets:
+            break
+        try:
+            # Un fichier encore ouvert ou mappé ailleurs reste lisible par son lecteur (POSIX)
+            os.remove(chemin)
+        except OSError:
+            continue
+        total -= taille
+
+def safe_filename(entite):
+    """Nom de fichier sûr pour une entité (« Forces Terrestres » → « Forces_Terrestres »)"""
+    return ''.join(c if c.isalnum() or c == '-' else '_' for c in entite)
+
+def cached_on_disk(elements, calcul):
+    """Lit le résultat dans le cache persistant s'il est activé, sinon le calcule et l'y stocke"""
+    disque = get_disk_cache()
+    if disque is None:
+        return calcul()
+    
+    valeur = disque.get(elements)
+    if valeur is not None:
+        stats = get_cache_stats()
+        with stats['verrou']:
+            stats['disque'] += 1
+        return valeur
+    valeur = calcul()
+    disque.set(elements, valeur)
+    return valeur
+
+@st.cache_resource(show_spinner=False)
+def get_disk_cache():
+    """Cache persistant du processus, ou None s'il n'est pas configuré"""
+    if not DISK_CACHE_PATH:
+        return None
+    return DiskCache(DISK_CACHE_PATH, DISK_CACHE_MAX_MO * 1024 * 1024)
+
+class ParquetDataSource:
+    """Source de données réelles : fichiers CSV/Parquet (Entite, Annee, indicateurs) d'un répertoire"""
+    
+    def __init__(self, repertoire):
+        self.repertoire = repertoire
+    
+    def available(self):
+        """Indique si pyarrow est installé et si le répertoire existe"""
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return False
+        return os.path.isdir(self.repertoire)
+    
+    def files(self, extension):
+        """Liste triée des fichiers du répertoire ayant l'extension donnée"""
+        if not os.path.isdir(self.repertoire):
+            return []
+        return sorted(entree.path for entree in os.scandir(self.repertoire)
+                      if entree.is_file() and entree.name.lower().endswith(extension))
+    
+    def version(self):
+        """Empreinte des fichiers présents (nom, taille, date) pour invalider les caches"""
+        empreinte = hashlib.blake2b(digest_size=8)
+        for chemin in self.files('.csv') + self.files('.parquet'):
+            infos = os.stat(chemin)
+            empreinte.update(f"{chemin}:{infos.st_size}:{infos.st_mtime_ns}".encode())
+        return empreinte.hexdigest()
+    
+    def convert_csv(self):
+        """Convertit en Parquet, par blocs, les CSV nouveaux ou modifiés"""
+        import pyarrow.csv as pa_csv
+        import pyarrow.parquet as pq
+        
+        for chemin in self.files('.csv'):
+            cible = os.path.splitext(chemin)[0] + '.parquet'
+            if os.path.exists(cible) and os.path.getmtime(cible) >= os.path.getmtime(chemin):
+                continue
+            
+            # Écriture dans un fichier temporaire puis remplacement atomique
+            descripteur, temporaire = tempfile.mkstemp(suffix='.tmp', dir=self.repertoire)
+            os.close(descripteur)
+            try:
+                lecteur = pa_csv.open_csv(chemin)
+                with pq.ParquetWriter(temporaire, lecteur.schema) as writer:
+                    for batch in lecteur:
+                        writer.write_batch(batch)
+                os.replace(temporaire, cible)
+            finally:
+                if os.path.exists(temporaire):
+                    os.remove(temporaire)
+    
+    def load(self, entite, colonnes, annees):
+        """Lit les colonnes demandées pour une entité et une plage d'années, ou None"""
+        reel = self.load_entities([entite], colonnes, annees)
+        if reel is None:
+            return None
+        return reel.drop(columns='Entite')
+    
+    def load_entities(self, entites, colonnes, annees):
+        """Lit en une passe par fichier les colonnes demandées pour plusieurs entités, ou None"""
+        if not self.available():
+            return None
+        import pyarrow.dataset as ds
+        
+        self.convert_csv()
+        annees = np.asarray(annees)
+        frames = []
+        for chemin in self.files('.parquet'):
+            dataset = ds.dataset(chemin, format='parquet')
+            noms = dataset.schema.names
+            utiles = [col for col in colonnes if col in noms and col not in ('Entite', 'Annee')]
+            if 'Entite' not in noms or 'Annee' not in noms or not utiles:
+                continue
+            
+            # Projection et filtres poussés jusqu'au lecteur Parquet
+            filtre = ((ds.field('Entite').isin(list(entites))) &
+                      (ds.field('Annee') >= annees.min().item()) &
+                      (ds.field('Annee') <= annees.max().item()))
+            table = dataset.to_table(columns=['Entite', 'Annee'] + utiles, filter=filtre)
+            if table.num_rows:
+                frames.append(table.to_pandas())
+        
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True)
+
+class ScenarioStore:
+    """Résultats multi-entités écrits une fois au format Arrow IPC et relus en memory-map"""
+    
+    def __init__(self, repertoire, max_octets):
+        self.repertoire = repertoire
+        self.max_octets = max_octets
+    
+    def path(self, elements):
+        """Fichier Arrow correspondant à un jeu de scénarios (et à la version du code)"""
+        cle = hashlib.blake2b(repr((code_version(), elements)).encode(), digest_size=16).hexdigest()
+        return os.path.join(self.repertoire, f"{cle}.arrow")
+    
+    def write(self, chemin, df_long):
+        """Écrit le format long, un lot par indicateur, puis remplace le fichier atomiquement"""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        
+        table = pa.Table.from_pandas(df_long, preserve_index=False)
+        indicateurs = [str(nom) for nom in df_long['Indicateur'].cat.categories]
+        table = table.replace_schema_metadata({
+            'indicateurs': json.dumps(indicateurs),
+            'entites': json.dumps([str(nom) for nom in df_long['Entite'].cat.categories]),
+            'derniere_annee': str(df_long['Annee'].max())
+        })
+        
+        os.makedirs(self.repertoire, exist_ok=True)
+        descripteur, temporaire = tempfile.mkstemp(suffix='.tmp', dir=self.repertoire)
+        os.close(descripteur)
+        try:
+            with pa.OSFile(temporaire, 'wb') as sortie, \
+                 pa.ipc.new_file(sortie, table.schema) as writer:
+                lot = table.combine_chunks().to_batches()[0]
+                colonne = pc.dictionary_decode(lot.column('Indicateur'))
+                for indicateur in indicateurs:
+                    writer.write_batch(lot.filter(pc.equal(colonne, indicateur)))
+            # mkstemp crée le fichier en 0600 : les autres workers doivent pouvoir le lire
+            os.chmod(temporaire, 0o644)
+            os.replace(temporaire, chemin)
+        finally:
+            if os.path.exists(temporaire):
+                os.remove(temporaire)
+    
+    def open(self, elements, calcul):
+        """Ouvre le jeu de scénarios, après l'avoir calculé et écrit s'il n'existe pas"""
+        chemin = self.path(elements)
+        try:
+            # La date de modification sert de date d'utilisation pour l'éviction
+            os.utime(chemin)
+            return ScenarioSet(chemin)
+        except FileNotFoundError:
+            pass
+        self.write(chemin, calcul())
+        self.prune(chemin)
+        return ScenarioSet(chemin)
+    
+    def prune(self, conserve):
+        """Supprime les fichiers les moins récemment ouverts au-delà de max_octets (sauf conserve)"""
+        prune_directory(self.repertoire, '.arrow', self.max_octets, conserve)
+
+class ScenarioSet:
+    """Jeu de scénarios ouvert en memory-map ; les graphiques en lisent des tranches"""
+    
+    def __init__(self, chemin):
+        import pyarrow as pa
+        
+        self.path = chemin
+        self.lecteur = pa.ipc.open_file(pa.memory_map(chemin, 'r'))
+        metadonnees = self.lecteur.schema.metadata
+        self.indicateurs = json.loads(metadonnees[b'indicateurs'])
+        self.entites = json.loads(metadonnees[b'entites'])
+        self.derniere_annee = int(float(metadonnees[b'derniere_annee']))
+    
+    def indicator_slice(self, indicateur, annee=None):
+        """Lignes d'un indicateur (toutes entités), éventuellement restreintes à une année"""
+        import pyarrow.compute as pc
+        
+        lot = self.lecteur.get_batch(self.indicateurs.index(indicateur))
+        if annee is not None:
+            lot = lot.filter(pc.equal(lot.column('Annee'), annee))
+        return lot.to_pandas(split_blocks=True)
+    
+    def chunks(self):
+        """Tranches successives du jeu complet, une par indicateur (export par blocs)"""
+        for indicateur in self.indicateurs:
+            yield self.indicator_slice(indicateur)
+    
+    def ranking(self, annee):
+        """Valeurs de tous les indicateurs pour une année, une ligne par entité"""
+        df = pd.concat([self.indicator_slice(indicateur, annee) for indicateur in self.indicateurs],
+                       ignore_index=True)
+        return df.pivot_table(index='Entite', columns='Indicateur', values='Valeur',
+                              observed=True)
+
+class DataExporter:
+    """Export CSV, Parquet ou XLSX écrit bloc par bloc, sans assembler le fichier en mémoire"""
+    
+    TYPES_MIME = {
+        'csv': 'text/csv',
+        'parquet': 'application/vnd.apache.parquet',
+        'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    }
+    
+    def __init__(self, format_):
+        if format_ not in self.available_formats():
+            raise ValueError(f"Format d'export indisponible : {format_!r}")
+        self.format = format_
+    
+    @classmethod
+    def available_formats(cls):
+        """Formats utilisables dans cet environnement (XLSX seulement avec xlsxwriter)"""
+        try:
+            import xlsxwriter  # noqa: F401
+        except ImportError:
+            return ['csv', 'parquet']
+        return list(cls.TYPES_MIME)
+    
+    def write(self, blocs, sortie):
+        """Écrit les blocs dans sortie (chemin ou fichier binaire) ; retourne le nombre de lignes"""
+        return getattr(self, f'write_{self.format}')(blocs, sortie)
+    
+    def temporary_file(self, blocs):
+        """Écrit l'export dans un fichier temporaire et le retourne ouvert, en début de fichier"""
+        fichier = tempfile.TemporaryFile()
+        self.write(blocs, fichier)
+        fichier.seek(0)
+        return fichier
+    
+    def write_csv(self, blocs, sortie):
+        """CSV : en-tête du premier bloc, puis lignes de chaque bloc à la suite"""
+        lignes = 0
+        with open_output(sortie) as f:
+            for bloc in blocs:
+                f.write(bloc.to_csv(index=False, header=lignes == 0).encode())
+                lignes += len(bloc)
+        return lignes
+    
+    def write_parquet(self, blocs, sortie):
+        """Parquet : un groupe de lignes par bloc, schéma fixé par le premier"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        lignes, writer = 0, None
+        try:
+            for bloc in blocs:
+                table = pa.Table.from_pandas(bloc, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(sortie, table.schema)
+                writer.write_table(table.cast(writer.schema))
+                lignes += len(bloc)
+        finally:
+            if writer is not None:
+                writer.close()
+        return lignes
+    
+    def write_xlsx(self, blocs, sortie):
+        """XLSX : lignes écrites dans l'ordre (constant_memory), nouvelle feuille au-delà de la limite"""
+        import xlsxwriter
+        
+        classeur = xlsxwriter.Workbook(sortie, {'constant_memory': True})
+        feuille, ligne, lignes = None, LIGNES_MAX_XLSX, 0
+        try:
+            for bloc in blocs:
+                # float32 → float64 via la représentation décimale la plus courte (43.6)
+                colonnes = [bloc[col].to_numpy().astype(str).astype('float64').tolist()
+                            if bloc[col].dtype == 'float32' else bloc[col].astype(object).tolist()
+                            for col in bloc.columns]
+                for valeurs in zip(*colonnes):
+                    if ligne >= LIGNES_MAX_XLSX:
+                        feuille = classeur.add_worksheet(f"Donnees{len(classeur.worksheets()) + 1}")
+                        feuille.write_row(0, 0, [str(col) for col in bloc.columns])
+                        ligne = 1
+                    feuille.write_row(ligne, 0, [None if valeur != valeur else valeur
+                                                 for valeur in valeurs])
+                    ligne += 1
+                lignes += len(bloc)
+        finally:
+            classeur.close()
+        return lignes
+
+@contextmanager
+def open_output(sortie):
+    """Ouvre un chemin en écriture binaire, ou utilise tel quel un fichier déjà ouvert"""
+    if hasattr(sortie, 'write'):
+        yield sortie
+    else:
+        with open(sortie, 'wb') as f:
+            yield f
+
+def configure_page():
+    """Configure la page et injecte le CSS (appelé au lancement, pas à l'import)"""
+    st.set_page_config(
+        page_title="Analyse de la Défense Européenne - UE",
+        page_icon="🛡️",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+    # CSS personnalisé
+    st.markdown("""
+    <style>
+        .main-header {
+            font-size: 2.5rem;
+            background: linear-gradient(45deg, #0055A4, #FFCC00, #009900);
+            -webkit-background-clip: text;
+            -webkit-text-fill-color: transparent;
+            text-align: center;
+            margin-bottom: 2rem;
+            font-weight: bold;
+        }
+        .metric-card {
+            background-color: #f0f2f6;
+            padding: 1rem;
+            border-radius: 10px;
+            border-left: 4px solid #0055A4;
+            margin: 0.5rem 0;
+        }
+        .section-header {
+            color: #0055A4;
+            border-bottom: 2px solid #0055A4;
+            padding-bottom: 0.5rem;
+            margin-top: 2rem;
+        }
+        .pays-card {
+            padding: 1rem;
+            border-radius: 10px;
+            margin: 0.5rem 0;
+            border-left: 5px solid #0055A4;
+            background-color: #f8f9fa;
+        }
+        .euro-flag {
+            background: linear-gradient(45deg, #0055A4, #FFCC00, #FFFFFF, #FF0000);
+            -webkit-background-clip: text;
+            -webkit-text-fill-color: transparent;
+            font-weight: bold;
+        }
+    </style>
+    """, unsafe_allow_html=True)
+
+@st.cache_resource(show_spinner=False)
+def get_perf_recorder():
+    """Mesures de performance partagées par toutes les sessions du processus"""
+    return PerfRecorder()
+
+@st.cache_resource
+def get_background_worker():
+    """Pool de précalcul partagé par toutes les sessions du processus"""
+    return BackgroundWorker()
+
+@st.cache_resource
+def get_figure_cache():
+    """Cache de figures partagé par toutes les sessions du processus"""
+    return FigureCache()
+
+@st.cache_resource(show_spinner=False)
+def get_cache_stats():
+    """Compteurs partagés par toutes les sessions du processus"""
+    return {'appels': 0, 'echecs': 0, 'disque': 0, 'verrou': threading.Lock()}
+
+@st.cache_resource
+def get_payload_stats():
+    """Dernière taille connue (octets) des figures de chaque section"""
+    return {}
+
+@st.cache_data(ttl=3600, max_entries=128, show_spinner=False)
+def cached_defense_data(pays_composante, config_version, data_version):
+    """Génère les données d'une sélection ; n'est exécuté qu'en cas d'échec du cache"""
+    stats = get_cache_stats()
+    with stats['verrou']:
+        stats['echecs'] += 1
+    return cached_on_disk(('donnees', pays_composante, config_version, data_version),
+                          lambda: DefenseEuropeenneDashboard().generate_defense_data(pays_composante))
+
+@st.cache_resource
+def get_scenario_store():
+    """Magasin de scénarios partagé par les sessions du processus"""
+    return ScenarioStore(SCENARIO_DIR, SCENARIO_DIR_MAX_MO * 1024 * 1024)
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def get_scenario_set(entites, config_version, data_version):
+    """Jeu de scénarios d'un ensemble d'entités, partagé (non copié) entre sessions"""
+    return get_scenario_store().open(
+        ('comparaison', entites, config_version, data_version),
+        lambda: DefenseEuropeenneDashboard().generate_comparison_data(list(entites))
+    )
 
 # Lancement du dashboard
 if __name__ == "__main__":
+    configure_page()
     dashboard = DefenseEuropeenneDashboard()
     dashboard.run_dashboard()
\ No newline at end of file
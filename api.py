@@ -0,0 +1,314 @@
+# api.py
+"""API HTTP/JSON servant les indicateurs calculés par le dashboard, depuis le même moteur et ses caches.
+
+Usage :
+    python api.py --hote 127.0.0.1 --port 8502
+
+Routes (toutes en GET) :
+    /entites                          entités disponibles et version de configuration
+    /donnees/{entite}                 séries d'une entité (format large)
+    /donnees?entites=France,Italie    séries de plusieurs entités (format long, toutes par défaut)
+    /kpi/{entite}                     indicateurs clés de la dernière année et évolution
+
+Paramètres communs : indicateurs=Budget_Defense_Mds,Personnel  debut=2017  fin=2027
+format=json|csv|arrow|parquet. Chaque réponse porte un ETag (requêtes conditionnelles
+If-None-Match → 304) et est compressée en gzip si le client l'accepte. Les corps
+sérialisés sont conservés dans un cache LRU dont la clé inclut les versions de
+configuration et de données : une requête répétée ne refait ni calcul ni sérialisation.
+Starlette et uvicorn sont installés avec Streamlit.
+"""
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from Dashboard import TYPE_INDICATEUR_DEFAUT, DefenseEuropeenneDashboard, cached_on_disk
+
+FORMATS = {
+    'json': 'application/json',
+    'csv': 'text/csv; charset=utf-8',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet'
+}
+# En dessous de cette taille, la compression coûte plus qu'elle ne rapporte
+TAILLE_MIN_GZIP = 500
+MAX_REPONSES = 1024
+
+
+class RequestError(Exception):
+    """Paramètre de requête invalide : renvoyé au client avec son code HTTP"""
+
+    def __init__(self, message, statut=400):
+        super().__init__(message)
+        self.statut = statut
+
+
+class ResponseCache:
+    """Cache LRU des réponses sérialisées : corps brut, corps gzip, type et ETag"""
+
+    def __init__(self, max_entrees=MAX_REPONSES):
+        self.max_entrees = max_entrees
+        self.entrees = OrderedDict()
+        self.verrou = threading.Lock()
+
+    def get(self, cle):
+        """Réponse en cache (marquée comme récemment utilisée) ou None"""
+        with self.verrou:
+            reponse = self.entrees.get(cle)
+            if reponse is not None:
+                self.entrees.move_to_end(cle)
+            return reponse
+
+    def set(self, cle, reponse):
+        """Enregistre une réponse et évince les plus anciennes au-delà de max_entrees"""
+        with self.verrou:
+            self.entrees[cle] = reponse
+            self.entrees.move_to_end(cle)
+            while len(self.entrees) > self.max_entrees:
+                self.entrees.popitem(last=False)
+
+
+dashboard = DefenseEuropeenneDashboard()
+reponses = ResponseCache()
+
+
+def available_entities():
+    """Pays, UE-27 et composantes, dans l'ordre du dashboard"""
+    return dashboard.pays_options + dashboard.composantes_options
+
+
+def check_entity(entite):
+    """Retourne l'entité si elle existe, sinon lève une erreur 404"""
+    if entite not in available_entities():
+        raise RequestError(f"Entité inconnue : {entite!r}", statut=404)
+    return entite
+
+
+def read_params(requete):
+    """Indicateurs, bornes d'années et format demandés (valeurs par défaut : tout, JSON)"""
+    parametres = requete.query_params
+    format_ = parametres.get('format', 'json')
+    if format_ not in FORMATS:
+        raise RequestError(f"Format inconnu : {format_!r} (attendu : {', '.join(FORMATS)})")
+    try:
+        debut = int(parametres['debut']) if 'debut' in parametres else None
+        fin = int(parametres['fin']) if 'fin' in parametres else None
+    except ValueError:
+        raise RequestError("debut et fin doivent être des années entières")
+    indicateurs = tuple(nom for nom in parametres.get('indicateurs', '').split(',') if nom)
+    return indicateurs, debut, fin, format_
+
+
+def filter_frame(df, indicateurs, debut, fin):
+    """Restreint un frame large aux indicateurs et à la plage d'années demandés"""
+    inconnus = [nom for nom in indicateurs if nom not in df.columns or nom == 'Annee']
+    if inconnus:
+        raise RequestError(f"Indicateurs inconnus : {', '.join(inconnus)}")
+    masque = pd.Series(True, index=df.index)
+    if debut is not None:
+        masque &= df['Annee'] >= debut
+    if fin is not None:
+        masque &= df['Annee'] <= fin
+    return df.loc[masque, ['Annee', *indicateurs] if indicateurs else df.columns]
+
+
+def serialize(df, format_, meta):
+    """Corps de la réponse dans le format demandé"""
+    if format_ == 'json':
+        # float32 → float64 via la représentation décimale la plus courte (43.6, pas 43.5999984741)
+        df = df.assign(**{col: df[col].to_numpy().astype(str).astype('float64')
+                          for col in df.select_dtypes('float32').columns})
+        lignes = json.loads(df.to_json(orient='records'))
+        return json.dumps({**meta, 'lignes': lignes}, ensure_ascii=False).encode()
+    if format_ == 'csv':
+        return df.to_csv(index=False).encode()
+
+    import pyarrow as pa
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tampon = io.BytesIO()
+    if format_ == 'arrow':
+        with pa.ipc.new_stream(tampon, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        import pyarrow.parquet as pq
+        pq.write_table(table, tampon)
+    return tampon.getvalue()
+
+
+def prepare(corps, format_):
+    """Réponse prête à servir : corps, version gzip si utile, type et ETag"""
+    compresse = gzip.compress(corps, compresslevel=6) if len(corps) >= TAILLE_MIN_GZIP else None
+    empreinte = hashlib.blake2b(corps, digest_size=16).hexdigest()
+    # Le corps gzip est une autre représentation : il a son propre ETag
+    return corps, compresse, FORMATS[format_], f'"{empreinte}"', f'"{empreinte}-gz"'
+
+
+def entity_data(entite, indicateurs, debut, fin, format_):
+    """Séries d'une entité au format large"""
+    df, _ = dashboard.load_defense_data(entite)
+    df = filter_frame(df, indicateurs, debut, fin)
+    return prepare(serialize(df, format_, {'entite': entite}), format_)
+
+
+def entities_data(entites, indicateurs, debut, fin, format_):
+    """Séries de plusieurs entités au format long (un indicateur absent d'une entité est omis)"""
+    frames = {entite: dashboard.load_defense_data(entite)[0] for entite in entites}
+    connus = set().union(*(df.columns for df in frames.values()))
+    inconnus = [nom for nom in indicateurs if nom not in connus or nom == 'Annee']
+    if inconnus:
+        raise RequestError(f"Indicateurs inconnus : {', '.join(inconnus)}")
+
+    longs = []
+    for entite, df in frames.items():
+        presents = [nom for nom in indicateurs if nom in df.columns]
+        if indicateurs and not presents:
+            continue
+        df = filter_frame(df, presents, debut, fin)
+        long = df.melt(id_vars='Annee', var_name='Indicateur', value_name='Valeur')
+        longs.append(long.assign(Entite=entite))
+    df_long = pd.concat(longs, ignore_index=True)[['Entite', 'Annee', 'Indicateur', 'Valeur']]
+    df_long = df_long[df_long['Valeur'].notna()]
+    df_long = df_long.astype({'Entite': 'category', 'Indicateur': 'category',
+                              'Valeur': TYPE_INDICATEUR_DEFAUT})
+    return prepare(serialize(df_long, format_, {'entites': list(entites)}), format_)
+
+
+def entity_kpi(entite, indicateurs, debut, fin, format_):
+    """Indicateurs de la dernière année, de l'année de référence et évolution en %"""
+    df, _ = dashboard.load_defense_data(entite)
+    metriques = cached_on_disk(
+        ('metriques', entite, dashboard.config_version(entite), dashboard.source.version(), True),
+        lambda: dashboard.compute_derived_metrics(df)
+    )
+    # La ligne d'une année mêle float32 et entiers en float64 : retour en float32 pour que
+    # serialize en donne la représentation courte, comme pour /donnees (4.4, pas 4.4000000954)
+    kpi = pd.DataFrame({'actuel': metriques['actuel'], 'reference': metriques['reference'],
+                        'evolution_pct': metriques['evolution_pct']}).astype('float32')
+    kpi = kpi.rename_axis('Indicateur').reset_index()
+    if indicateurs:
+        kpi = kpi[kpi['Indicateur'].isin(indicateurs)]
+    meta = {'entite': entite, 'annee': int(metriques['derniere_annee']),
+            'annee_reference': int(metriques['annee_reference'])}
+    return prepare(serialize(kpi, format_, meta), format_)
+
+
+def etag_matches(if_none_match, etag):
+    """Comparaison faible d'If-None-Match (liste d'ETags, préfixe W/ ou *) avec l'ETag servi"""
+    if not if_none_match:
+        return False
+    candidats = [candidat.strip() for candidat in if_none_match.split(',')]
+    return '*' in candidats or etag in (candidat.removeprefix('W/') for candidat in candidats)
+
+
+def accepts_gzip(accept_encoding):
+    """Indique si Accept-Encoding autorise gzip (q > 0, nommé ou via *)"""
+    poids = {}
+    for element in accept_encoding.split(','):
+        codage, _, parametres = element.partition(';')
+        q = 1.0
+        for parametre in parametres.split(';'):
+            nom, _, valeur = parametre.strip().partition('=')
+            if nom.strip().lower() == 'q':
+                try:
+                    q = float(valeur)
+                except ValueError:
+                    q = 0.0
+        poids[codage.strip().lower()] = q
+    return poids.get('gzip', poids.get('*', 0.0)) > 0
+
+
+async def serve(requete, cle, construire):
+    """Sert une réponse depuis le cache (calculée hors de la boucle en cas d'échec), avec ETag et gzip"""
+    try:
+        parametres = read_params(requete)
+        cle = cle + parametres + (dashboard.source.version(),)
+        reponse = reponses.get(cle)
+        if reponse is None:
+            reponse = await run_in_threadpool(construire, *parametres)
+            reponses.set(cle, reponse)
+    except RequestError as erreur:
+        return JSONResponse({'erreur': str(erreur)}, status_code=erreur.statut)
+
+    corps, compresse, media_type, etag, etag_gzip = reponse
+    entetes = {'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+    if compresse is not None and accepts_gzip(requete.headers.get('accept-encoding', '')):
+        corps, etag = compresse, etag_gzip
+        entetes['Content-Encoding'] = 'gzip'
+    entetes['ETag'] = etag
+    if etag_matches(requete.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers=entetes)
+    return Response(corps, media_type=media_type, headers=entetes)
+
+
+async def route_entities(requete):
+    """Liste des entités et version du registre de configurations"""
+    return JSONResponse({'version_configuration': dashboard.registry.version,
+                         'empreinte': dashboard.registry.empreinte,
+                         'entites': available_entities()})
+
+
+async def route_entity_data(requete):
+    """Séries d'une entité"""
+    try:
+        entite = check_entity(requete.path_params['entite'])
+    except RequestError as erreur:
+        return JSONResponse({'erreur': str(erreur)}, status_code=erreur.statut)
+    return await serve(requete, ('donnees', entite, dashboard.config_version(entite)),
+                        lambda *parametres: entity_data(entite, *parametres))
+
+
+async def route_data(requete):
+    """Séries de plusieurs entités (toutes par défaut), format long"""
+    try:
+        demandees = requete.query_params.get('entites')
+        entites = tuple(check_entity(nom) for nom in demandees.split(',')) \
+            if demandees else tuple(available_entities())
+    except RequestError as erreur:
+        return JSONResponse({'erreur': str(erreur)}, status_code=erreur.statut)
+    versions = tuple(dashboard.config_version(entite) for entite in entites)
+    return await serve(requete, ('donnees_long', entites, versions),
+                        lambda *parametres: entities_data(entites, *parametres))
+
+
+async def route_kpi(requete):
+    """Indicateurs clés d'une entité"""
+    try:
+        entite = check_entity(requete.path_params['entite'])
+        # Les KPI portent toujours sur la dernière année et l'année de référence
+        if 'debut' in requete.query_params or 'fin' in requete.query_params:
+            raise RequestError("debut et fin ne s'appliquent pas aux KPI")
+    except RequestError as erreur:
+        return JSONResponse({'erreur': str(erreur)}, status_code=erreur.statut)
+    return await serve(requete, ('kpi', entite, dashboard.config_version(entite)),
+                        lambda *parametres: entity_kpi(entite, *parametres))
+
+
+app = Starlette(routes=[
+    Route('/entites', route_entities),
+    Route('/donnees', route_data),
+    Route('/donnees/{entite}', route_entity_data),
+    Route('/kpi/{entite}', route_kpi)
+])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hote', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(app, host=args.hote, port=args.port, log_level='warning', access_log=False)
+
+
+if __name__ == "__main__":
+    main()
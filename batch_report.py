@@ -0,0 +1,108 @@
+# batch_report.py
+"""Export hors Streamlit du dossier de synthèse : une page HTML, un CSV et des PNG par entité.
+
+Usage :
+    python batch_report.py --sortie rapports
+    python batch_report.py --sortie rapports --formats html csv --processus 4 --entites France Italie
+
+Les entités sont réparties sur un pool de processus ; chaque rapport est écrit sur
+disque dès qu'il est prêt. L'export PNG nécessite le paquet optionnel `kaleido`.
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Dashboard import GRAINE_MONTE_CARLO, DefenseEuropeenneDashboard, safe_filename, simulate_monte_carlo
+
+FORMATS = ['html', 'csv', 'png']
+
+
+def peak_memory_mb():
+    """Pic de mémoire résidente du processus courant, en Mo (ru_maxrss est en Ko sous Linux)"""
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pic / 1024 / 1024 if sys.platform == 'darwin' else pic / 1024
+
+
+def write_html(chemin, entite, figures):
+    """Écrit toutes les figures d'une entité dans une seule page HTML autonome"""
+    with open(chemin, 'w', encoding='utf-8') as f:
+        f.write(f'<html><head><meta charset="utf-8"><title>Défense - {entite}</title></head>'
+                f'<body><h1>🛡️ Analyse de la Défense - {entite}</h1>\n')
+        for i, fig in enumerate(figures.values()):
+            # plotly.js n'est chargé qu'une fois par page
+            f.write(fig.to_html(full_html=False, include_plotlyjs='cdn' if i == 0 else False))
+        f.write('</body></html>\n')
+
+
+def render_entity(entite, flux, sortie, formats, n_trajectoires):
+    """Tâche d'un processus : calcule, construit et écrit le rapport d'une entité"""
+    debut = time.perf_counter()
+    dashboard = DefenseEuropeenneDashboard()
+    df, config = dashboard.generate_defense_data(entite)
+    metriques = dashboard.compute_derived_metrics(df)
+    eventails = simulate_monte_carlo(df, n_trajectoires, GRAINE_MONTE_CARLO, flux, config) \
+        if n_trajectoires else None
+    
+    base = os.path.join(sortie, safe_filename(entite))
+    fichiers = []
+    if 'csv' in formats:
+        df.to_csv(f'{base}.csv', index=False)
+        fichiers.append(f'{base}.csv')
+    if 'html' in formats or 'png' in formats:
+        figures = dashboard.build_figures(df, metriques, eventails)
+        if 'html' in formats:
+            write_html(f'{base}.html', entite, figures)
+            fichiers.append(f'{base}.html')
+        if 'png' in formats:
+            os.makedirs(base, exist_ok=True)
+            for chart_id, fig in figures.items():
+                fig.write_image(os.path.join(base, f'{chart_id}.png'))
+            fichiers.append(base + os.sep)
+    return entite, fichiers, time.perf_counter() - debut, peak_memory_mb()
+
+
+def main():
+    dashboard = DefenseEuropeenneDashboard()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sortie', default='rapports', help="répertoire de sortie")
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=['html', 'csv'])
+    parser.add_argument('--entites', nargs='+',
+                        default=dashboard.pays_options + dashboard.composantes_options)
+    parser.add_argument('--processus', type=int, default=os.cpu_count(),
+                        help="nombre de processus (1 = séquentiel)")
+    parser.add_argument('--trajectoires', type=int, default=5000,
+                        help="trajectoires Monte Carlo par entité (0 = sans éventails)")
+    args = parser.parse_args()
+    
+    if 'png' in args.formats:
+        try:
+            import kaleido  # noqa: F401
+        except ImportError:
+            parser.error("l'export PNG nécessite le paquet kaleido (pip install kaleido)")
+    
+    os.makedirs(args.sortie, exist_ok=True)
+    debut = time.perf_counter()
+    pic_travailleurs = 0.0
+    
+    with ProcessPoolExecutor(max_workers=args.processus) as pool:
+        taches = [pool.submit(render_entity, entite, flux, args.sortie, args.formats,
+                              args.trajectoires)
+                  for flux, entite in enumerate(args.entites)]
+        for termine, tache in enumerate(as_completed(taches), 1):
+            entite, fichiers, duree, pic = tache.result()
+            pic_travailleurs = max(pic_travailleurs, pic)
+            print(f"[{termine}/{len(taches)}] {entite} : {len(fichiers)} fichier(s) en {duree:.2f} s",
+                  flush=True)
+    
+    duree_totale = time.perf_counter() - debut
+    print(f"{len(args.entites)} entités en {duree_totale:.1f} s "
+          f"({len(args.entites) / duree_totale:.1f} entités/s)")
+    print(f"Pic mémoire : {peak_memory_mb():.0f} Mo (principal), "
+          f"{pic_travailleurs:.0f} Mo (par processus)")
+
+
+if __name__ == "__main__":
+    main()
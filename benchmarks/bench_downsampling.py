@@ -0,0 +1,60 @@
+# bench_downsampling.py
+"""Mesure la taille des figures et leur temps de construction + sérialisation, avec et sans
+sous-échantillonnage min/max, sur des séries journalières de plusieurs décennies.
+
+Usage : python benchmarks/bench_downsampling.py
+
+Le temps de rendu côté navigateur n'est pas mesuré ici ; il croît avec le nombre de
+points et de traces SVG, que la réduction borne à ~2 × LARGEUR_GRAPHIQUE_PX.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import Dashboard
+from Dashboard import DefenseEuropeenneDashboard, simulate_monte_carlo
+
+
+def measure(dashboard, df, eventails):
+    """Construit et sérialise les figures des onglets budget, capacités et efficacité"""
+    debut = time.perf_counter()
+    figures = [
+        dashboard.build_budget_figure(df),
+        dashboard.build_personnel_figure(df),
+        dashboard.build_capabilities_figure(df),
+        dashboard.build_reaction_time_figure(df),
+        dashboard.build_economies_figure(df),
+        dashboard.build_fan_figure(df, eventails['Budget_Defense_Mds'], 'Budget_Defense_Mds',
+                                   "Budget", '#0055A4')
+    ]
+    octets = sum(len(fig.to_json()) for fig in figures)
+    return octets, time.perf_counter() - debut
+
+
+def main():
+    dashboard = DefenseEuropeenneDashboard()
+    # Échauffement : import de plotly.express et validateurs plotly
+    df, _ = dashboard.generate_defense_data('France')
+    measure(dashboard, df, simulate_monte_carlo(df, n_trajectoires=100))
+    
+    print(f"{'série':<28}{'points':>9}{'brut (Ko)':>12}{'réduit (Ko)':>13}"
+          f"{'brut (ms)':>11}{'réduit (ms)':>13}")
+    for debut, fin in [(2017, 2027), (2017, 2047), (1990, 2067)]:
+        annees = dashboard.analysis_period(debut, fin, 365)
+        df, _ = dashboard.generate_defense_data('France', annees)
+        eventails = simulate_monte_carlo(df, n_trajectoires=1000)
+        
+        reduit = measure(dashboard, df, eventails)
+        # Sans réduction : une largeur de graphique assez grande pour tout garder
+        largeur = Dashboard.LARGEUR_GRAPHIQUE_PX
+        Dashboard.LARGEUR_GRAPHIQUE_PX = len(df)
+        brut = measure(dashboard, df, eventails)
+        Dashboard.LARGEUR_GRAPHIQUE_PX = largeur
+        
+        print(f"{f'journalier {debut}-{fin}':<28}{len(df):>9}{brut[0] / 1024:>12.0f}"
+              f"{reduit[0] / 1024:>13.0f}{brut[1] * 1e3:>11.0f}{reduit[1] * 1e3:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
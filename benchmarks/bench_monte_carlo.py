@@ -0,0 +1,41 @@
+# bench_monte_carlo.py
+"""Mesure le moteur Monte Carlo sur toutes les entités, en séquentiel et en pool de processus.
+
+Usage : python benchmarks/bench_monte_carlo.py [n_trajectoires]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from Dashboard import DefenseEuropeenneDashboard, run_monte_carlo
+
+
+def main():
+    n_trajectoires = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    dashboard = DefenseEuropeenneDashboard()
+    entites = dashboard.pays_options + dashboard.composantes_options
+    
+    debut = time.perf_counter()
+    sequentiel = run_monte_carlo(entites, n_trajectoires, max_workers=1)
+    duree_sequentielle = time.perf_counter() - debut
+    
+    debut = time.perf_counter()
+    parallele = run_monte_carlo(entites, n_trajectoires)
+    duree_parallele = time.perf_counter() - debut
+    
+    # Reproductibilité : même graine, même résultat quel que soit le découpage en processus
+    for entite in entites:
+        for nom, percentiles in sequentiel[entite].items():
+            np.testing.assert_array_equal(percentiles, parallele[entite][nom])
+    
+    print(f"{n_trajectoires} trajectoires × {len(entites)} entités")
+    print(f"    séquentiel : {duree_sequentielle:.2f} s")
+    print(f"    pool de {os.cpu_count()} processus : {duree_parallele:.2f} s")
+    print("    résultats identiques")
+
+
+if __name__ == "__main__":
+    main()
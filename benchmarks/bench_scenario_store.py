@@ -0,0 +1,67 @@
+# bench_scenario_store.py
+"""Compare la mémoire tenue par N sessions en mode comparaison : copie pandas privée du
+format long par session (ancien st.cache_data) contre tranches lues dans le fichier
+Arrow mappé partagé (ScenarioStore).
+
+Usage : python benchmarks/bench_scenario_store.py [--sessions 50] [--pas-par-an 12]
+
+La mémoire est mesurée avec tracemalloc (allocations Python et NumPy) ; les pages du
+memory-map relèvent du cache système et sont partagées entre processus.
+"""
+import argparse
+import os
+import pickle
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from Dashboard import DefenseEuropeenneDashboard, ScenarioStore
+
+
+def measure(fonction):
+    """Pic d'allocation (octets) et durée d'un appel"""
+    tracemalloc.start()
+    debut = time.perf_counter()
+    resultat = fonction()
+    duree = time.perf_counter() - debut
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultat, pic, duree
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--pas-par-an', type=int, default=12)
+    args = parser.parse_args()
+    
+    dashboard = DefenseEuropeenneDashboard()
+    entites = dashboard.pays_options + dashboard.composantes_options
+    annees = dashboard.analysis_period(2017, 2067, args.pas_par_an)
+    df_long = dashboard.generate_comparison_data(entites, annees)
+    serialise = pickle.dumps(df_long)
+    
+    with tempfile.TemporaryDirectory() as repertoire:
+        store = ScenarioStore(repertoire, float('inf'))
+        scenarios = store.open(('bench', args.pas_par_an), lambda: df_long)
+        indicateur = scenarios.indicateurs[0]
+        
+        # Chaque session reçoit sa copie (désérialisation du cache de données)
+        _, pic_copies, duree_copies = measure(
+            lambda: [pickle.loads(serialise) for _ in range(args.sessions)])
+        # Chaque session lit la tranche de l'indicateur affiché dans le fichier partagé
+        _, pic_tranches, duree_tranches = measure(
+            lambda: [scenarios.indicator_slice(indicateur) for _ in range(args.sessions)])
+        taille_fichier = os.path.getsize(scenarios.path)
+    
+    print(f"{len(df_long)} lignes, {args.sessions} sessions, fichier Arrow : "
+          f"{taille_fichier / 1e6:.1f} Mo")
+    print(f"{'copies pandas':<18}{pic_copies / 1e6:>10.1f} Mo{duree_copies * 1e3:>10.0f} ms")
+    print(f"{'tranches mappées':<18}{pic_tranches / 1e6:>10.1f} Mo{duree_tranches * 1e3:>10.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# bench_simulation.py
+"""Compare le moteur de simulation vectorisé aux anciennes boucles Python par année.
+
+Usage : python benchmarks/bench_simulation.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from Dashboard import DefenseEuropeenneDashboard
+
+
+def legacy_generate_defense_data(dashboard, pays_composante, annees):
+    """Implémentation de référence : une compréhension de liste par indicateur"""
+    config = dashboard.get_config(pays_composante)
+    budget_base = config.get('budget_base', 10.0)
+    personnel_base = config.get('personnel_base', 50000)
+    base_pesco = config.get('projets_pesco_base', 5)
+    
+    projets = []
+    for annee in annees:
+        if annee < 2017:
+            projets.append(0)
+        elif annee < 2020:
+            projets.append(base_pesco * (annee - 2016) // 3)
+        elif annee < 2023:
+            projets.append(base_pesco + 2 * (annee - 2019))
+        else:
+            projets.append(base_pesco + 6 + 3 * (annee - 2022))
+    base_eco = 0.5 if config['type'] == 'pays_ue' else 2.0
+    
+    data = {
+        'Annee': annees,
+        'Budget_Defense_Mds': [budget_base * (1 + 0.03 * (a - 2017)) for a in annees],
+        'Personnel': [personnel_base * (1 - 0.005 * (a - 2017)) for a in annees],
+        'Projets_PESCO': projets,
+        'Interoperabilite': [min(45 + 8 * (a - 2017), 95) for a in annees],
+        'Capacite_Projection': [min(30 + 7 * (a - 2017), 95) for a in annees],
+        'Temps_Reaction_Jours': [max(30 - 2 * (a - 2017), 7) for a in annees],
+        'Economies_Echelle_Mds': [base_eco * (a - 2016) * 0.8 for a in annees if a >= 2017]
+                                 + [0] * int(2017 - min(annees)),
+        'Exercices_Communs': [10 + 3 * (a - 2017) for a in annees],
+        'Equipements_Interoperables': [min(25 + 10 * (a - 2017), 90) for a in annees]
+    }
+    if config['type'] in ['pays_ue', 'union']:
+        if 'cyberdefense' in config.get('specialisations', []):
+            data['Capacite_Cyber'] = [min(40 + 8 * (a - 2017), 95) for a in annees]
+        if 'renseignement' in config.get('specialisations', []):
+            data['Partage_Renseignement'] = [min(30 + 9 * (a - 2017), 95) for a in annees]
+    return pd.DataFrame(data), config
+
+
+def check_identity(dashboard, entites):
+    """Vérifie que le moteur vectorisé reproduit exactement les anciennes sorties"""
+    annees = list(range(2017, 2028))
+    membres = pd.concat([dashboard.generate_defense_data(m)[0] for m in dashboard.member_states()])
+    for entite in entites:
+        # Les agrégats (UE-27) n'ont plus de simulation propre : cumul des États membres
+        if dashboard.get_config(entite)['type'] == 'union':
+            obtenu, _ = dashboard.generate_defense_data(entite)
+            cumul = membres.groupby('Annee')[['Budget_Defense_Mds', 'Personnel']].sum()
+            np.testing.assert_allclose(obtenu.set_index('Annee')[cumul.columns], cumul, rtol=1e-6)
+            continue
+        attendu, _ = legacy_generate_defense_data(dashboard, entite, annees)
+        obtenu, _ = dashboard.generate_defense_data(entite)
+        # Seuls les types diffèrent : le schéma compact stocke en int16/int32/float32
+        pd.testing.assert_frame_equal(obtenu, attendu, check_dtype=False, rtol=1e-6)
+    
+    # Le calcul par lots doit coïncider avec le calcul entité par entité
+    batch, _ = dashboard.simulate_batch(entites)
+    for i, entite in enumerate(entites):
+        df, _ = dashboard.generate_defense_data(entite)
+        for col in df.columns.drop('Annee'):
+            np.testing.assert_allclose(batch[col][i], df[col].to_numpy(), rtol=1e-6)
+
+
+def memory_per_row(dashboard, entites, pas_par_an):
+    """Empreinte mémoire par ligne du format long multi-entités (seuils : tests/test_dashboard.py)"""
+    annees = dashboard.analysis_period(2017, 2067, pas_par_an)
+    df_long = dashboard.generate_comparison_data(entites, annees)
+    return df_long.memory_usage(deep=True, index=False).sum() / len(df_long)
+
+
+def main():
+    dashboard = DefenseEuropeenneDashboard()
+    entites = dashboard.pays_options + dashboard.composantes_options
+    check_identity(dashboard, entites)
+    print(f"Sorties identiques pour {len(entites)} entités")
+    for libelle, pas in [("annuel", 1), ("mensuel", 12)]:
+        octets = memory_per_row(dashboard, entites, pas)
+        print(f"Format long {libelle} : {octets:.2f} octets par ligne")
+    
+    scenarios = [
+        ("annuel 2017-2027", 1, 2027),
+        ("mensuel 2017-2067", 12, 2067),
+        ("hebdomadaire 2017-2117", 52, 2117),
+    ]
+    print(f"{'résolution':<26}{'boucles (ms)':>14}{'vectorisé (ms)':>16}{'lots (ms)':>12}{'gain':>8}")
+    for nom, pas, fin in scenarios:
+        annees = dashboard.analysis_period(2017, fin, pas)
+        annees_liste = annees.tolist()
+        repetitions = 5
+        
+        legacy = min(timeit.repeat(
+            lambda: [legacy_generate_defense_data(dashboard, e, annees_liste) for e in entites],
+            number=1, repeat=repetitions))
+        vectorise = min(timeit.repeat(
+            lambda: [dashboard.generate_defense_data(e, annees) for e in entites],
+            number=1, repeat=repetitions))
+        lots = min(timeit.repeat(
+            lambda: dashboard.simulate_batch(entites, annees),
+            number=1, repeat=repetitions))
+        print(f"{nom:<26}{legacy * 1e3:>14.2f}{vectorise * 1e3:>16.2f}{lots * 1e3:>12.2f}"
+              f"{legacy / lots:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# import_time.py
+"""Mesure le temps d'import du module Dashboard via `python -X importtime`.
+
+Usage :
+    python benchmarks/import_time.py                  # version courante
+    python benchmarks/import_time.py --ref HEAD~1     # compare avec une révision git
+    python benchmarks/import_time.py --budget-ms 1500 # échoue si le budget est dépassé
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+RACINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def measure(repertoire, repetitions=3):
+    """Retourne (total_ms, [(cumul_ms, module)]) pour l'import de Dashboard le plus rapide"""
+    meilleur = None
+    for _ in range(repetitions):
+        resultat = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import Dashboard'],
+            cwd=repertoire, capture_output=True, text=True
+        )
+        if resultat.returncode != 0:
+            raise RuntimeError(resultat.stderr.strip().splitlines()[-1])
+        
+        modules = []
+        for ligne in resultat.stderr.splitlines():
+            if not ligne.startswith('import time:') or '|' not in ligne:
+                continue
+            _, cumul, nom = ligne[len('import time:'):].split('|')
+            if cumul.strip().isdigit():
+                modules.append((int(cumul) / 1000, nom.rstrip()))
+        
+        # Les modules de premier niveau ne sont indentés que d'un espace
+        total = sum(cumul for cumul, nom in modules if not nom.startswith('  '))
+        if meilleur is None or total < meilleur[0]:
+            meilleur = (total, modules)
+    return meilleur
+
+
+def print_report(titre, total, modules, top=8):
+    print(f"{titre}: {total:.0f} ms")
+    # Imports directs de Dashboard (profondeur 1 dans l'arbre de -X importtime)
+    directs = [(c, n.strip()) for c, n in modules
+               if n.startswith('   ') and not n.startswith('    ')]
+    for cumul, nom in sorted(directs, reverse=True)[:top]:
+        print(f"    {cumul:>9.1f} ms  {nom}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ref', help="révision git à comparer (ex. baseline, HEAD~1)")
+    parser.add_argument('--budget-ms', type=float, help="temps d'import maximal autorisé")
+    args = parser.parse_args()
+    
+    total, modules = measure(RACINE)
+    
+    if args.ref:
+        source = subprocess.run(['git', 'show', f'{args.ref}:Dashboard.py'], cwd=RACINE,
+                                capture_output=True, text=True, check=True).stdout
+        with tempfile.TemporaryDirectory() as repertoire:
+            with open(os.path.join(repertoire, 'Dashboard.py'), 'w') as f:
+                f.write(source)
+            total_ref, modules_ref = measure(repertoire)
+        print_report(f"Avant ({args.ref})", total_ref, modules_ref)
+        print_report("Après", total, modules)
+        print(f"Gain : {total_ref - total:.0f} ms ({(1 - total / total_ref) * 100:.0f}%)")
+    else:
+        print_report("Import de Dashboard", total, modules)
+    
+    if args.budget_ms is not None and total > args.budget_ms:
+        print(f"Budget dépassé : {total:.0f} ms > {args.budget_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
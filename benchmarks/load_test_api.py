@@ -0,0 +1,143 @@
+# load_test_api.py
+"""Test de charge de l'API (api.py) : débit et latences sur un mélange de requêtes.
+
+Usage :
+    python benchmarks/load_test_api.py --demarrer                  # lance l'API sur un port libre
+    python benchmarks/load_test_api.py --url http://127.0.0.1:8502 --clients 16 --duree 20
+
+Chaque client est un thread avec une connexion HTTP persistante (keep-alive) qui
+parcourt en boucle des requêtes par entité, multi-entités, KPI et conditionnelles
+(If-None-Match). Le client et le serveur partagent la machine : sur peu de cœurs,
+le débit mesuré est un minorant.
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+RACINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+ENTITES = ['France', 'Allemagne', 'Italie', 'Pologne', 'UE-27', 'Forces Terrestres']
+
+
+def request_mix():
+    """Mélange de requêtes : (chemin, en-têtes, renvoyer l'ETag de la réponse précédente)"""
+    requetes = []
+    for entite in ENTITES:
+        entite = quote(entite)
+        requetes += [
+            (f'/donnees/{entite}', {'Accept-Encoding': 'gzip'}, False),
+            (f'/donnees/{entite}?indicateurs=Budget_Defense_Mds,Personnel&debut=2020', {}, False),
+            (f'/kpi/{entite}', {}, False),
+            (f'/donnees/{entite}', {}, True),
+        ]
+    requetes += [('/donnees?format=arrow', {}, False), ('/donnees?format=parquet', {}, True)]
+    return requetes
+
+
+def client(hote, port, fin, resultats, verrou):
+    """Boucle d'un client jusqu'à l'échéance ; enregistre latences et statuts"""
+    connexion = http.client.HTTPConnection(hote, port)
+    etags = {}
+    latences, statuts = [], {}
+    requetes = request_mix()
+    i = 0
+    while time.perf_counter() < fin:
+        chemin, entetes, conditionnelle = requetes[i % len(requetes)]
+        i += 1
+        # Le corps gzip a son propre ETag : un ETag par chemin et encodage accepté
+        representation = (chemin, entetes.get('Accept-Encoding'))
+        if conditionnelle and representation in etags:
+            entetes = {**entetes, 'If-None-Match': etags[representation]}
+        debut = time.perf_counter()
+        connexion.request('GET', chemin, headers=entetes)
+        reponse = connexion.getresponse()
+        reponse.read()
+        latences.append(time.perf_counter() - debut)
+        statuts[reponse.status] = statuts.get(reponse.status, 0) + 1
+        if reponse.getheader('ETag'):
+            etags[representation] = reponse.getheader('ETag')
+    connexion.close()
+    with verrou:
+        resultats['latences'] += latences
+        for statut, nombre in statuts.items():
+            resultats['statuts'][statut] = resultats['statuts'].get(statut, 0) + nombre
+
+
+def free_port():
+    """Port TCP libre sur la boucle locale"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_server(hote, port, delai=60):
+    """Attend que l'API réponde (import de Streamlit, pandas...)"""
+    limite = time.time() + delai
+    while time.time() < limite:
+        try:
+            connexion = http.client.HTTPConnection(hote, port, timeout=1)
+            connexion.request('GET', '/entites')
+            connexion.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"L'API ne répond pas sur {hote}:{port}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', default='http://127.0.0.1:8502')
+    parser.add_argument('--demarrer', action='store_true', help="lance api.py le temps du test")
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duree', type=float, default=10.0)
+    parser.add_argument('--min-rps', type=float, default=0.0,
+                        help="code de sortie 1 si le débit est inférieur")
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    hote, port = url.hostname, url.port or 80
+    serveur = None
+    if args.demarrer:
+        port = free_port()
+        serveur = subprocess.Popen([sys.executable, os.path.join(RACINE, 'api.py'),
+                                    '--hote', hote, '--port', str(port)])
+    try:
+        wait_for_server(hote, port)
+        # Échauffement : remplit les caches du moteur et des réponses
+        client(hote, port, time.perf_counter() + 2, {'latences': [], 'statuts': {}},
+               threading.Lock())
+
+        resultats = {'latences': [], 'statuts': {}}
+        verrou = threading.Lock()
+        fin = time.perf_counter() + args.duree
+        threads = [threading.Thread(target=client, args=(hote, port, fin, resultats, verrou))
+                   for _ in range(args.clients)]
+        debut = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        ecoule = time.perf_counter() - debut
+    finally:
+        if serveur is not None:
+            serveur.terminate()
+            serveur.wait()
+
+    latences = sorted(resultats['latences'])
+    debit = len(latences) / ecoule
+    print(f"{len(latences)} requêtes en {ecoule:.1f} s avec {args.clients} clients : {debit:.0f} req/s")
+    for quantile in (50, 90, 99):
+        print(f"  p{quantile} : {latences[int(len(latences) * quantile / 100) - 1] * 1e3:.2f} ms")
+    print("  statuts : " + ', '.join(f"{statut}={nombre}"
+                                      for statut, nombre in sorted(resultats['statuts'].items())))
+    if debit < args.min_rps:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# run_benchmarks.py
+"""Suite de benchmarks du pipeline de données et de rendu, résultats comparables entre commits.
+
+Usage :
+    python benchmarks/run_benchmarks.py                       # mesure et enregistre
+    python benchmarks/run_benchmarks.py --filtre simulate_    # sous-ensemble
+    python benchmarks/run_benchmarks.py --compare HEAD~1 --max-regression 1.2
+
+Chaque exécution est enregistrée dans benchmarks/results/<commit>.json ; une exécution
+filtrée y fusionne ses mesures sans effacer les autres. Les figures sont mesurées seules
+(build_*), puis avec chaque section complète (create_*) appelée hors serveur Streamlit :
+en mode « bare », les appels st.* ne produisent rien mais la sérialisation des figures
+reste comprise, avec le cache de figures froid ou chaud.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+
+import numpy as np
+
+RACINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+RESULTATS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+sys.path.insert(0, RACINE)
+
+from Dashboard import (PLAGES_SENSIBILITE, DefenseEuropeenneDashboard, get_figure_cache,
+                       get_scenario_set, run_monte_carlo, simulate_monte_carlo)
+
+# Horizons des simulateurs : annuel 2017-2027, mensuel 2017-2067, hebdomadaire 2017-2117
+HORIZONS = [('annuel', 2027, 1), ('mensuel', 2067, 12), ('hebdo', 2117, 52)]
+SIMULATEURS_AVEC_CONFIG = ['simulate_budget', 'simulate_personnel', 'simulate_pesco_projects',
+                           'simulate_economies']
+SIMULATEURS = ['simulate_interoperability', 'simulate_projection_capacity',
+               'simulate_reaction_time', 'simulate_joint_exercises',
+               'simulate_interoperable_equipment', 'simulate_cyber_capacity',
+               'simulate_intelligence_sharing']
+
+
+def define_benchmarks(dashboard):
+    """Retourne la liste (nom, fonction sans argument) de tous les benchmarks"""
+    entites = dashboard.pays_options + dashboard.composantes_options
+    config = dashboard.get_config('France')
+    benchmarks = []
+    
+    for entite in entites:
+        benchmarks.append((f'generate_defense_data[{entite}]',
+                           lambda e=entite: dashboard.generate_defense_data(e)))
+    
+    for horizon, fin, pas in HORIZONS:
+        annees = dashboard.analysis_period(2017, fin, pas)
+        for nom in SIMULATEURS_AVEC_CONFIG:
+            benchmarks.append((f'{nom}[{horizon}]',
+                               lambda f=getattr(dashboard, nom), a=annees: f(a, config)))
+        for nom in SIMULATEURS:
+            benchmarks.append((f'{nom}[{horizon}]', lambda f=getattr(dashboard, nom), a=annees: f(a)))
+    
+    df, _ = dashboard.generate_defense_data('France')
+    metriques = dashboard.compute_derived_metrics(df)
+    benchmarks.append(('compute_derived_metrics[France]',
+                       lambda: dashboard.compute_derived_metrics(df)))
+    for chart_id, builder in [
+        ('budget', dashboard.build_budget_figure),
+        ('personnel', dashboard.build_personnel_figure),
+        ('pesco', dashboard.build_pesco_figure),
+        ('exercices', dashboard.build_exercises_figure),
+        ('capacites', dashboard.build_capabilities_figure),
+        ('temps_reaction', dashboard.build_reaction_time_figure),
+        ('economies', dashboard.build_economies_figure),
+        ('specialisations', dashboard.build_specialisations_figure),
+        ('comparaison', lambda d: dashboard.build_comparative_figure(metriques['moyennes_periode']))
+    ]:
+        benchmarks.append((f'build_figure[{chart_id}]', lambda b=builder: b(df).to_json()))
+    
+    eventails = simulate_monte_carlo(df, 1000)
+    scenarios = get_scenario_set(tuple(entites), dashboard.registry.empreinte,
+                                 dashboard.source.version())
+    tranche = scenarios.indicator_slice('Budget_Defense_Mds')
+    effets = dashboard.sensitivity_effects('France', 2027)
+    grille = dashboard.sensitivity_grid('France', 'croissance_budget', 'plafond_interoperabilite',
+                                        'Budget_Defense_Mds', 2027)
+    for chart_id, builder in [
+        ('eventail', lambda: dashboard.build_fan_figure(df, eventails['Budget_Defense_Mds'],
+                                                        'Budget_Defense_Mds', 'Budget', '#0055A4')),
+        ('comparaison_barres', lambda: dashboard.build_comparison_bar_figure(
+            tranche, 'Budget_Defense_Mds', 2027)),
+        ('comparaison_courbes', lambda: dashboard.build_comparison_line_figure(
+            tranche, 'Budget_Defense_Mds')),
+        ('tornade', lambda: dashboard.build_tornado_figure(effets, 'Budget_Defense_Mds', 2027)),
+        ('carte_chaleur', lambda: dashboard.build_heatmap_figure(
+            grille, 'croissance_budget', 'plafond_interoperabilite', 'Budget_Defense_Mds', 2027))
+    ]:
+        benchmarks.append((f'build_figure[{chart_id}]', lambda b=builder: b().to_json()))
+    
+    for section, creer in [
+        ('vue_ensemble', lambda: (dashboard.display_key_metrics(metriques, config),
+                                  dashboard.create_strategic_insights(metriques, config, 'France'))),
+        ('budgets', lambda: dashboard.create_budget_analysis(df, config, eventails)),
+        ('cooperation', lambda: dashboard.create_cooperation_analysis(df, config)),
+        ('capacites', lambda: dashboard.create_capabilities_analysis(df, config, eventails)),
+        ('efficacite', lambda: dashboard.create_efficiency_analysis(df, config)),
+        ('comparatif', lambda: dashboard.create_comparative_analysis(df, config, metriques)),
+        ('europe', dashboard.create_european_overview),
+        ('sensibilite', lambda: dashboard.create_sensitivity_analysis('France')),
+        ('comparaison', lambda: dashboard.create_comparison_analysis(scenarios))
+    ]:
+        benchmarks.append((f'create_section[{section}, figures en cache]', creer))
+        benchmarks.append((f'create_section[{section}, figures construites]',
+                           lambda c=creer: (get_figure_cache.clear(), c())))
+    
+    annees_mensuelles = dashboard.analysis_period(2017, 2067, 12)
+    grille_sensibilite = {nom: np.linspace(*PLAGES_SENSIBILITE[nom], 100)
+                          for nom in ['croissance_budget', 'plafond_interoperabilite']}
+    benchmarks += [
+        ('echelle/simulate_batch[31 entites, mensuel]',
+         lambda: dashboard.simulate_batch(entites, annees_mensuelles)),
+        ('echelle/generate_comparison_data[31 entites, mensuel]',
+         lambda: dashboard.generate_comparison_data(entites, annees_mensuelles)),
+        ('echelle/generate_defense_data[31 entites, mensuel]',
+         lambda: [dashboard.generate_defense_data(e, annees_mensuelles) for e in entites]),
+        ('echelle/run_monte_carlo[31 entites, 1000 trajectoires]',
+         lambda: run_monte_carlo(entites, 1000, max_workers=1)),
+        ('echelle/sensitivity_sweep[31 entites, grille 100x100]',
+         lambda: dashboard.sensitivity_sweep(entites, grille_sensibilite, 2027)),
+        ('sensitivity_effects[France]', lambda: dashboard.sensitivity_effects('France', 2027)),
+    ]
+    return benchmarks
+
+
+def measure(fonction, repetitions=5):
+    """Temps par appel (µs) : minimum et médiane de `repetitions` séries calibrées"""
+    timer = timeit.Timer(fonction)
+    nombre, _ = timer.autorange()
+    temps = sorted(t / nombre * 1e6 for t in timer.repeat(repeat=repetitions, number=nombre))
+    return {'min_us': temps[0], 'median_us': temps[len(temps) // 2]}
+
+
+def current_commit(ref='HEAD'):
+    """Identifiant court d'une révision git (ou 'local' hors dépôt)"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', ref], cwd=RACINE, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'local'
+
+
+def load_baseline(ref):
+    """Charge un fichier de résultats, désigné par chemin ou par révision git"""
+    chemin = ref if os.path.exists(ref) else os.path.join(RESULTATS, f'{current_commit(ref)}.json')
+    with open(chemin, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filtre', default='', help="ne lancer que les benchmarks contenant ce texte")
+    parser.add_argument('--compare', help="révision git ou fichier de résultats de référence")
+    parser.add_argument('--max-regression', type=float,
+                        help="échoue si un benchmark est plus lent que ce ratio (ex. 1.2)")
+    args = parser.parse_args()
+    
+    dashboard = DefenseEuropeenneDashboard()
+    resultats = {}
+    for nom, fonction in define_benchmarks(dashboard):
+        if args.filtre in nom:
+            resultats[nom] = measure(fonction)
+            print(f"{nom:<60}{resultats[nom]['median_us']:>14.1f} µs", flush=True)
+    
+    commit = current_commit()
+    os.makedirs(RESULTATS, exist_ok=True)
+    chemin = os.path.join(RESULTATS, f'{commit}.json')
+    enregistres = dict(resultats)
+    if args.filtre and os.path.exists(chemin):
+        # Exécution partielle : les autres mesures de la référence de ce commit sont conservées
+        with open(chemin, encoding='utf-8') as f:
+            enregistres = {**json.load(f)['resultats'], **resultats}
+    with open(chemin, 'w', encoding='utf-8') as f:
+        json.dump({'commit': commit, 'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                   'python': platform.python_version(), 'machine': platform.machine(),
+                   'resultats': enregistres}, f, indent=2, ensure_ascii=False)
+    print(f"Résultats enregistrés dans {chemin} ({len(resultats)} mesurés, {len(enregistres)} au total)")
+    
+    if args.compare:
+        reference = load_baseline(args.compare)
+        print(f"\nComparaison avec {reference['commit']} (médianes)")
+        regressions = []
+        for nom, mesure in resultats.items():
+            if nom not in reference['resultats']:
+                continue
+            ratio = mesure['median_us'] / reference['resultats'][nom]['median_us']
+            marque = ''
+            if args.max_regression and ratio > args.max_regression:
+                regressions.append(nom)
+                marque = '  ← régression'
+            print(f"{nom:<60}{ratio:>8.2f}x{marque}")
+        if regressions:
+            print(f"{len(regressions)} régression(s) au-delà de {args.max_regression}x")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
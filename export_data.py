@@ -0,0 +1,53 @@
+# export_data.py
+"""Export hors Streamlit des données au format long (entité, année, indicateur, valeur).
+
+Usage :
+    python export_data.py --sortie donnees.parquet
+    python export_data.py --sortie donnees.csv --entites France Italie UE-27
+    python export_data.py --sortie donnees.parquet --pas-par-an 365 --fin 2117   # ~12 M lignes
+
+Le format est déduit de l'extension (.csv, .parquet, .xlsx ; XLSX nécessite le paquet
+optionnel `xlsxwriter`). Les entités sont simulées puis écrites une à une : la mémoire
+reste bornée par la taille d'un bloc, quel que soit le nombre total de lignes.
+"""
+import argparse
+import os
+import time
+
+from batch_report import peak_memory_mb
+from Dashboard import DataExporter, DefenseEuropeenneDashboard
+
+
+def main():
+    dashboard = DefenseEuropeenneDashboard()
+    toutes = dashboard.pays_options + dashboard.composantes_options
+    
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sortie', required=True, help="fichier .csv, .parquet ou .xlsx")
+    parser.add_argument('--entites', nargs='+', default=toutes, choices=toutes, metavar='ENTITE')
+    parser.add_argument('--debut', type=int, default=2017)
+    parser.add_argument('--fin', type=int, default=2027)
+    parser.add_argument('--pas-par-an', type=int, default=1,
+                        help="résolution temporelle (1 : annuelle, 12 : mensuelle, 365 : journalière)")
+    args = parser.parse_args()
+    
+    format_ = os.path.splitext(args.sortie)[1].lstrip('.').lower()
+    if format_ not in DataExporter.available_formats():
+        parser.error(f"format {format_!r} indisponible ({', '.join(DataExporter.available_formats())})")
+    
+    # Période par défaut : lecture dans les caches ; sinon simulation entité par entité
+    annees = None
+    if (args.debut, args.fin, args.pas_par_an) != (2017, 2027, 1):
+        annees = dashboard.analysis_period(args.debut, args.fin, args.pas_par_an)
+    
+    entites = list(dict.fromkeys(args.entites))
+    debut = time.perf_counter()
+    lignes = DataExporter(format_).write(dashboard.export_chunks(entites, annees), args.sortie)
+    duree = time.perf_counter() - debut
+    print(f"{lignes:,} lignes ({len(entites)} entités) écrites dans {args.sortie} "
+          f"en {duree:.1f} s ({os.path.getsize(args.sortie) / 1e6:.1f} Mo)")
+    print(f"Pic mémoire : {peak_memory_mb():.0f} Mo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+# conftest.py
+"""Rend les modules du dépôt (Dashboard, api...) importables depuis les tests"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
@@ -0,0 +1,115 @@
+# test_api.py
+"""Tests de l'API HTTP : routes, erreurs, formats, ETag et compression"""
+import asyncio
+import gzip
+import io
+import json
+
+import pytest
+
+import api
+
+
+def appeler(chemin, entetes=None):
+    """Requête GET envoyée directement à l'application ASGI ; retourne (statut, en-têtes, corps)"""
+    chemin, _, requete = chemin.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': chemin, 'raw_path': chemin.encode(), 'root_path': '',
+        'query_string': requete.encode(), 'client': ('test', 0), 'server': ('test', 80),
+        'headers': [(nom.lower().encode(), valeur.encode()) for nom, valeur in (entetes or {}).items()]
+    }
+    messages = []
+
+    async def recevoir():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def envoyer(message):
+        messages.append(message)
+
+    asyncio.run(api.app(scope, recevoir, envoyer))
+    entetes_reponse = {nom.decode(): valeur.decode() for nom, valeur in messages[0]['headers']}
+    corps = b''.join(message.get('body', b'') for message in messages[1:])
+    return messages[0]['status'], entetes_reponse, corps
+
+
+def test_entities_route_lists_countries_and_components():
+    statut, _, corps = appeler('/entites')
+    entites = json.loads(corps)['entites']
+    assert statut == 200
+    assert 'UE-27' in entites and 'Forces Terrestres' in entites
+
+
+def test_entity_series_are_filtered_and_serialised_without_float32_noise():
+    statut, _, corps = appeler('/donnees/France?indicateurs=Budget_Defense_Mds&debut=2018&fin=2019')
+    lignes = json.loads(corps)['lignes']
+    assert statut == 200
+    assert lignes == [{'Annee': 2018, 'Budget_Defense_Mds': 41.2},
+                      {'Annee': 2019, 'Budget_Defense_Mds': 42.4}]
+
+
+@pytest.mark.parametrize('chemin, statut', [
+    ('/donnees/Atlantide', 404),
+    ('/donnees/France?format=xml', 400),
+    ('/donnees/France?indicateurs=Inconnu', 400),
+    ('/donnees/France?debut=deux-mille', 400),
+    ('/kpi/Atlantide', 404),
+    ('/kpi/France?debut=2020', 400),
+    ('/kpi/France?fin=2020', 400),
+])
+def test_invalid_requests_return_errors(chemin, statut):
+    assert appeler(chemin)[0] == statut
+
+
+def test_long_format_covers_requested_entities():
+    pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+
+    statut, _, corps = appeler('/donnees?entites=France,UE-27&indicateurs=Personnel&format=parquet')
+    table = pq.read_table(io.BytesIO(corps)).to_pandas()
+    assert statut == 200
+    assert set(table['Entite']) == {'France', 'UE-27'}
+    assert len(table) == 2 * 11
+
+
+def test_conditional_request_returns_not_modified():
+    _, entetes, _ = appeler('/donnees/Italie')
+    statut, _, corps = appeler('/donnees/Italie', {'If-None-Match': entetes['etag']})
+    assert statut == 304
+    assert corps == b''
+
+
+def test_gzip_body_when_accepted():
+    _, entetes, corps = appeler('/donnees/Italie', {'Accept-Encoding': 'gzip'})
+    assert entetes['content-encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(corps))['entite'] == 'Italie'
+
+
+@pytest.mark.parametrize('accept_encoding, compresse', [
+    ('gzip;q=0', False), ('gzip; q=0.0, identity', False), ('*;q=0', False),
+    ('deflate, gzip;q=0.5', True), ('*', True), ('br;q=1, *;q=0.1', True),
+])
+def test_gzip_follows_accept_encoding_q_values(accept_encoding, compresse):
+    _, entetes, _ = appeler('/donnees/Italie', {'Accept-Encoding': accept_encoding})
+    assert ('content-encoding' in entetes) == compresse
+
+
+@pytest.mark.parametrize('if_none_match', ['W/{etag}', '"autre", {etag}', '*'])
+def test_conditional_request_uses_weak_comparison_and_lists(if_none_match):
+    _, entetes, _ = appeler('/donnees/Italie')
+    statut, _, _ = appeler('/donnees/Italie', {'If-None-Match': if_none_match.format(etag=entetes['etag'])})
+    assert statut == 304
+
+
+def test_gzip_body_has_its_own_etag():
+    _, identite, _ = appeler('/donnees/Italie')
+    _, compresse, _ = appeler('/donnees/Italie', {'Accept-Encoding': 'gzip'})
+    assert compresse['etag'] != identite['etag']
+    assert appeler('/donnees/Italie', {'Accept-Encoding': 'gzip', 'If-None-Match': identite['etag']})[0] == 200
+    assert appeler('/donnees/Italie', {'Accept-Encoding': 'gzip', 'If-None-Match': compresse['etag']})[0] == 304
+
+
+def test_kpi_values_are_serialised_without_float_noise():
+    _, _, corps = appeler('/kpi/France?indicateurs=Economies_Echelle_Mds')
+    assert json.loads(corps)['lignes'] == [{'Indicateur': 'Economies_Echelle_Mds', 'actuel': 4.4,
+                                            'reference': 0.4, 'evolution_pct': 1000.0}]
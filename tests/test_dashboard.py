@@ -0,0 +1,344 @@
+# test_dashboard.py
+"""Tests du moteur : schéma compact, registre de configurations, agrégat UE-27, cache disque, export"""
+import json
+import os
+import threading
+import time
+import types
+import zipfile
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import Dashboard
+from Dashboard import (AGREGATION_UNION, ConfigRegistry, DataExporter, DefenseEuropeenneDashboard, DiskCache,
+                       ScenarioStore)
+
+
+@pytest.fixture(scope='module')
+def dashboard():
+    return DefenseEuropeenneDashboard()
+
+
+def registre(**entites):
+    """Registre minimal : un profil par défaut et les entités données"""
+    return ConfigRegistry({'defaut': 'pays_ue',
+                           'profils': {'pays_ue': {'type': 'pays_ue', 'budget_base': 8.0}},
+                           'entites': entites})
+
+
+@pytest.mark.parametrize('pas_par_an, octets_max', [(1, 8.5), (12, 10.5)])
+def test_long_format_memory_per_row(dashboard, pas_par_an, octets_max):
+    """Format long : codes int8, valeur float32, année int16 ou float32 (8 ou 10 octets par ligne)"""
+    entites = dashboard.pays_options + dashboard.composantes_options
+    annees = dashboard.analysis_period(2017, 2067, pas_par_an)
+    df_long = dashboard.generate_comparison_data(entites, annees)
+    octets_par_ligne = df_long.memory_usage(deep=True, index=False).sum() / len(df_long)
+    assert octets_par_ligne <= octets_max
+
+
+def test_wide_frame_uses_compact_dtypes(dashboard):
+    df, _ = dashboard.load_defense_data('France')
+    assert df['Annee'].dtype == np.int16
+    assert df['Personnel'].dtype == np.int32
+    assert df['Budget_Defense_Mds'].dtype == np.float32
+
+
+def test_registry_resolves_inheritance_and_overrides():
+    config = registre(France={'herite': 'pays_ue', 'budget_base': 40.0}).get('France')
+    assert config == {'type': 'pays_ue', 'budget_base': 40.0}
+
+
+def test_registry_gives_default_profile_to_unknown_entities():
+    assert registre().get('Malte') == {'type': 'pays_ue', 'budget_base': 8.0}
+
+
+def test_registry_rejects_inheritance_cycles():
+    with pytest.raises(ValueError, match='Héritage circulaire'):
+        registre(A={'herite': 'B'}, B={'herite': 'A'})
+
+
+@pytest.mark.parametrize('definition, message', [
+    ({'herite': 'pays_ue', 'inconnu': 1}, 'champs inconnus'),
+    ({'type': 'planete'}, 'type'),
+    ({'herite': 'pays_ue', 'budget_base': -1}, 'nombre positif'),
+    ({'herite': 'pays_ue', 'croissance_budget': '3%'}, 'doit être un nombre'),
+    ({'herite': 'pays_ue', 'specialisations': 'cyber'}, 'liste de chaînes'),
+    ({'herite': 'absent'}, 'inconnu'),
+])
+def test_registry_rejects_invalid_definitions(definition, message):
+    with pytest.raises(ValueError, match=message):
+        registre(France=definition)
+
+
+def test_union_is_rolled_up_from_member_states(dashboard):
+    ue, _ = dashboard.generate_defense_data('UE-27')
+    membres = pd.concat([dashboard.generate_defense_data(m)[0] for m in dashboard.member_states()])
+    attendu = membres.groupby('Annee').agg({col: AGREGATION_UNION.get(col, 'mean')
+                                            for col in ue.columns.drop('Annee')})
+    np.testing.assert_allclose(ue.set_index('Annee')[attendu.columns].to_numpy(dtype=float),
+                               attendu.to_numpy(dtype=float), rtol=1e-4)
+    assert len(dashboard.member_states()) == 27
+
+
+def test_union_cache_miss_reads_members_from_entity_cache(dashboard, tmp_path, monkeypatch):
+    with open(Dashboard.CONFIG_PATH, encoding='utf-8') as f:
+        contenu = json.load(f)
+    contenu['entites']['France']['budget_base'] += 1.0
+    chemin = tmp_path / 'config_defense.json'
+    chemin.write_text(json.dumps(contenu), encoding='utf-8')
+    
+    avant, _ = dashboard.load_defense_data('UE-27')
+    monkeypatch.setattr(Dashboard, 'CONFIG_PATH', str(chemin))
+    modifie = DefenseEuropeenneDashboard()
+    stats = Dashboard.get_cache_stats()
+    echecs, appels = stats['echecs'], stats['appels']
+    apres, _ = modifie.load_defense_data('UE-27')
+    
+    # Seuls l'agrégat et le pays modifié sont recalculés ; les 26 autres membres sont relus
+    assert stats['echecs'] - echecs == 2
+    assert stats['appels'] - appels == 1 + 27
+    assert apres['Budget_Defense_Mds'][0] - avant['Budget_Defense_Mds'][0] == pytest.approx(1.0)
+
+
+def test_batch_matches_entity_by_entity(dashboard):
+    entites = ['France', 'Malte', 'UE-27', 'Forces Maritimes']
+    batch, _ = dashboard.simulate_batch(entites)
+    for i, entite in enumerate(entites):
+        df, _ = dashboard.generate_defense_data(entite)
+        for col in df.columns.drop('Annee'):
+            np.testing.assert_allclose(batch[col][i], df[col].to_numpy(dtype=float), rtol=1e-6)
+
+
+def test_monte_carlo_bounds_follow_entity_configuration():
+    df = pd.DataFrame({'Annee': np.arange(2017, 2041, dtype='int16'),
+                       'Interoperabilite': np.full(24, 91.0, dtype='float32')})
+    defaut = Dashboard.simulate_monte_carlo(df, n_trajectoires=2000)['Interoperabilite']
+    plafonne = Dashboard.simulate_monte_carlo(df, n_trajectoires=2000,
+                                              config={'plafond_interoperabilite': 92})['Interoperabilite']
+    assert defaut[-1].max() == pytest.approx(95)
+    assert plafonne[-1].max() == pytest.approx(92)
+
+
+def test_monte_carlo_engine_is_timed():
+    df = pd.DataFrame({'Annee': np.arange(2017, 2031, dtype='int16'),
+                       'Interoperabilite': np.full(14, 60.0, dtype='float32')})
+    Dashboard.simulate_monte_carlo(df, n_trajectoires=100)
+    etapes = Dashboard.get_perf_recorder().snapshot()
+    assert 'simulate_monte_carlo' in etapes
+    assert 'config_bound' not in etapes
+
+
+def test_monte_carlo_never_cuts_the_central_series():
+    df = pd.DataFrame({'Annee': np.arange(2017, 2041, dtype='int16'),
+                       'Interoperabilite': np.full(24, 99.0, dtype='float32')})
+    # Série au-dessus du plafond par défaut (données réelles, moyenne d'agrégat)
+    eventail = Dashboard.simulate_monte_carlo(df, n_trajectoires=2000)['Interoperabilite']
+    assert (eventail[-1] >= 99 - 1e-6).all()
+
+
+def test_selection_is_not_queued_behind_prefetches(monkeypatch):
+    worker = Dashboard.BackgroundWorker(max_workers=2)
+    monkeypatch.setattr(Dashboard, 'get_background_worker', lambda: worker)
+    monkeypatch.setattr(Dashboard, 'get_session_id', lambda: 'session')
+    dashboard = DefenseEuropeenneDashboard()
+    
+    def chargement_lent(entite):
+        time.sleep(0.3)
+        return pd.DataFrame({'Annee': [2017]}), {}
+    monkeypatch.setattr(dashboard, 'load_defense_data', chargement_lent)
+    
+    dashboard.prefetch(dashboard.likely_next_selections('France'))
+    debut = time.perf_counter()
+    dashboard.wait_for_data('Pologne')
+    # Un seul chargement en direct : les précalculs en file sont annulés, pas attendus
+    assert time.perf_counter() - debut < 0.55
+    assert worker.pending() <= 2
+    worker.pool.shutdown()
+
+
+def test_cancel_speculative_spares_tasks_wanted_elsewhere():
+    worker = Dashboard.BackgroundWorker(max_workers=1)
+    bloque = threading.Event()
+    en_cours = worker.submit('en_cours', bloque.wait, session='a')
+    partagee = worker.submit('partagee', lambda: 1, session='a')
+    worker.submit('partagee', lambda: 1, session='b')
+    propre = worker.submit('propre', lambda: 1, session='a')
+    requise = worker.submit('requise', lambda: 1, session='a')
+    worker.submit('requise', lambda: 1)
+    
+    worker.cancel_speculative('a')
+    assert propre.cancelled()
+    assert not partagee.cancelled() and not requise.cancelled() and not en_cours.cancelled()
+    bloque.set()
+    assert partagee.result() == 1 and requise.result() == 1
+    worker.pool.shutdown()
+
+
+def test_speculative_task_finished_at_submit_is_forgotten():
+    worker = Dashboard.BackgroundWorker(max_workers=1)
+    future = Future()
+    future.set_result(1)
+    worker.pool = types.SimpleNamespace(submit=lambda calcul: future)
+    worker.submit('rapide', lambda: 1, session='a')
+    assert worker.pending() == 0
+    worker.cancel_speculative('a')
+
+
+def source_reelle(repertoire):
+    """Répertoire de données réelles : un CSV (France 2017-2020, Italie 2018)"""
+    pytest.importorskip('pyarrow')
+    (repertoire / 'sipri.csv').write_text(
+        'Entite,Annee,Budget_Defense_Mds,Personnel\n'
+        'France,2017,40.5,201000\nFrance,2018,44.5,\nFrance,2019,45.0,199000\n'
+        'France,2020,46.0,198000\nItalie,2018,25.2,170000\n', encoding='utf-8')
+    return Dashboard.ParquetDataSource(str(repertoire))
+
+
+def test_real_data_csv_is_converted_once(tmp_path):
+    source = source_reelle(tmp_path)
+    source.convert_csv()
+    parquet = tmp_path / 'sipri.parquet'
+    modification = os.path.getmtime(parquet)
+    source.convert_csv()
+    assert os.path.getmtime(parquet) == modification
+    assert len(pd.read_parquet(parquet)) == 5
+
+
+def test_real_data_reads_only_requested_entities_years_and_columns(tmp_path):
+    reel = source_reelle(tmp_path).load_entities(['France'], ['Budget_Defense_Mds', 'Inconnu'], [2018, 2019])
+    assert list(reel.columns) == ['Entite', 'Annee', 'Budget_Defense_Mds']
+    assert set(reel['Entite']) == {'France'}
+    assert list(reel['Annee']) == [2018, 2019]
+
+
+def test_real_values_replace_simulated_ones(tmp_path):
+    dashboard = DefenseEuropeenneDashboard()
+    simule, _ = dashboard.generate_defense_data('France')
+    dashboard.source = source_reelle(tmp_path)
+    df, _ = dashboard.generate_defense_data('France')
+    par_annee = df.set_index('Annee')
+    assert par_annee.loc[2018, 'Budget_Defense_Mds'] == pytest.approx(44.5)
+    # Valeur réelle absente (cellule vide) : la simulation est conservée
+    assert par_annee.loc[2018, 'Personnel'] == simule.set_index('Annee').loc[2018, 'Personnel']
+    assert par_annee.loc[2025, 'Budget_Defense_Mds'] == simule.set_index('Annee').loc[2025, 'Budget_Defense_Mds']
+
+
+def test_annual_real_value_covers_every_point_of_its_year(tmp_path):
+    dashboard = DefenseEuropeenneDashboard()
+    dashboard.source = source_reelle(tmp_path)
+    annees = dashboard.analysis_period(2017, 2022, 12)
+    df, _ = dashboard.generate_defense_data('France', annees)
+    de_2018 = np.floor(df['Annee'].to_numpy(dtype=float)) == 2018
+    assert de_2018.sum() == 12
+    np.testing.assert_allclose(df.loc[de_2018, 'Budget_Defense_Mds'], 44.5)
+    
+    entites = ['France', 'Italie', 'UE-27']
+    batch, _ = dashboard.simulate_batch(entites, annees)
+    for i, entite in enumerate(entites):
+        df, _ = dashboard.generate_defense_data(entite, annees)
+        np.testing.assert_allclose(batch['Budget_Defense_Mds'][i], df['Budget_Defense_Mds'], rtol=1e-6)
+
+
+def test_disk_cache_round_trips_values(tmp_path):
+    cache = DiskCache(str(tmp_path), max_octets=1024 * 1024)
+    assert cache.get(('donnees', 'France')) is None
+    cache.set(('donnees', 'France'), {'budget': [1.5, 2.5]})
+    assert cache.get(('donnees', 'France')) == {'budget': [1.5, 2.5]}
+
+
+def test_disk_cache_ignores_entries_from_another_code_version(tmp_path, monkeypatch):
+    DiskCache(str(tmp_path), max_octets=1024 * 1024).set(('donnees', 'France'), 'ancien calcul')
+    monkeypatch.setattr(Dashboard, 'VERSION_SCHEMA', Dashboard.VERSION_SCHEMA + 1)
+    assert DiskCache(str(tmp_path), max_octets=1024 * 1024).get(('donnees', 'France')) is None
+
+
+def test_disk_cache_evicts_least_recently_read(tmp_path):
+    valeur = b'x' * 1000
+    cache = DiskCache(str(tmp_path), max_octets=2500)
+    cache.set('a', valeur)
+    cache.set('b', valeur)
+    maintenant = time.time()
+    os.utime(cache.file('a'), (maintenant - 100, maintenant - 100))
+    os.utime(cache.file('b'), (maintenant - 50, maintenant - 50))
+    assert cache.get('a') == valeur
+    cache.set('c', valeur)
+    assert cache.get('b') is None
+    assert cache.get('a') == valeur
+    assert cache.get('c') == valeur
+
+
+def test_disk_cache_reads_do_not_write_recently_used_entries(tmp_path):
+    cache = DiskCache(str(tmp_path), max_octets=1024 * 1024)
+    cache.set('a', 1)
+    recent = time.time() - Dashboard.DISK_CACHE_ACCES_S / 2
+    os.utime(cache.file('a'), (recent, recent))
+    assert cache.get('a') == 1
+    assert os.path.getmtime(cache.file('a')) == pytest.approx(recent)
+
+
+def test_scenario_store_evicts_least_recently_opened_files(dashboard, tmp_path):
+    df_long = dashboard.generate_comparison_data(['France', 'Malte'])
+    sonde = ScenarioStore(str(tmp_path), float('inf'))
+    taille = os.path.getsize(sonde.open(('sonde',), lambda: df_long).path)
+    os.remove(sonde.path(('sonde',)))
+    
+    store = ScenarioStore(str(tmp_path), 2.5 * taille)
+    a = store.open(('a',), lambda: df_long).path
+    b = store.open(('b',), lambda: df_long).path
+    maintenant = time.time()
+    os.utime(a, (maintenant - 100, maintenant - 100))
+    os.utime(b, (maintenant - 50, maintenant - 50))
+    store.open(('a',), lambda: pytest.fail("jeu existant recalculé"))
+    c = store.open(('c',), lambda: df_long).path
+    assert os.path.exists(a) and os.path.exists(c)
+    assert not os.path.exists(b)
+
+
+def blocs_exemple():
+    df = pd.DataFrame({'Annee': np.arange(2017, 2027, dtype='int16'),
+                       'Budget_Defense_Mds': np.linspace(40, 49, 10, dtype='float32')})
+    return [df.iloc[:4], df.iloc[4:]], df
+
+
+def test_csv_export_writes_header_once(tmp_path):
+    blocs, df = blocs_exemple()
+    chemin = tmp_path / 'export.csv'
+    assert DataExporter('csv').write(blocs, str(chemin)) == len(df)
+    relu = pd.read_csv(chemin)
+    assert list(relu.columns) == list(df.columns)
+    np.testing.assert_allclose(relu['Budget_Defense_Mds'], df['Budget_Defense_Mds'], rtol=1e-6)
+
+
+def test_parquet_export_keeps_schema(tmp_path):
+    pytest.importorskip('pyarrow')
+    blocs, df = blocs_exemple()
+    chemin = tmp_path / 'export.parquet'
+    DataExporter('parquet').write(blocs, str(chemin))
+    pd.testing.assert_frame_equal(pd.read_parquet(chemin), df.reset_index(drop=True))
+
+
+def test_xlsx_export_opens_new_sheet_past_row_limit(tmp_path, monkeypatch):
+    pytest.importorskip('xlsxwriter')
+    monkeypatch.setattr(Dashboard, 'LIGNES_MAX_XLSX', 5)
+    blocs, df = blocs_exemple()
+    chemin = tmp_path / 'export.xlsx'
+    assert DataExporter('xlsx').write(blocs, str(chemin)) == len(df)
+    with zipfile.ZipFile(chemin) as archive:
+        feuilles = [nom for nom in archive.namelist() if nom.startswith('xl/worksheets/sheet')]
+    # 4 lignes de données par feuille (en-tête compris : 5) → 3 feuilles pour 10 lignes
+    assert len(feuilles) == 3
+
+
+def test_export_chunks_deduplicate_entities(dashboard):
+    blocs = list(dashboard.export_chunks(['France', 'Malte', 'France']))
+    assert len(blocs) == 2
+    assert [bloc['Entite'].iloc[0] for bloc in blocs] == ['France', 'Malte']
+    assert list(blocs[0]['Entite'].cat.categories) == ['France', 'Malte']
+
+
+def test_exporter_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        DataExporter('ods')